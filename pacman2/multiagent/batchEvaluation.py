@@ -0,0 +1,176 @@
+# batchEvaluation.py
+# ------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Evaluation of many leaf states at once.
+
+A BatchEvaluator scores a list of states of one layout with the terms of
+betterEvaluationFunction (multiAgents.py).  The 1/(d+1) Manhattan weights
+between every pair of cells are precomputed per layout, so the food term is
+a weighted sum over the food bits instead of a loop of manhattanDistance
+calls.  With NumPy the whole batch is one matrix product; without it each
+state sums whole distance rings of food with one AND and a bit count.
+
+The values equal betterEvaluationFunction's up to float rounding (the terms
+are added in another order).
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from util import manhattanDistance
+
+BATCH_EVALUATOR_CACHE = {}
+
+
+class BatchEvaluator:
+    """
+    The precomputed tables of one layout.  Cells are numbered like the bits
+    of a BitGrid: (x, y) is x * height + y.
+    """
+
+    def __init__(self, walls, useNumpy=True):
+        self.width = walls.width
+        self.height = walls.height
+        size = self.width * self.height
+        self.size = size
+        self.nbytes = (size + 7) // 8
+        cells = [(x, y) for x in range(self.width) for y in range(self.height)]
+        # per cell: (d, 1/(d+1), mask of all the cells at distance d), d = 0, 1, ...
+        self.rings = []
+        for x, y in cells:
+            masks = {}
+            for cx, cy in cells:
+                d = abs(cx - x) + abs(cy - y)
+                masks[d] = masks.get(d, 0) | (1 << (cx * self.height + cy))
+            self.rings.append([(d, 1.0 / (d + 1), masks[d]) for d in sorted(masks)])
+        self.inverse = None
+        if numpy is not None and useNumpy:
+            xs = numpy.array([x for x, y in cells])
+            ys = numpy.array([y for x, y in cells])
+            distance = numpy.abs(xs[:, None] - xs[None, :]) + numpy.abs(ys[:, None] - ys[None, :])
+            self.inverse = 1.0 / (distance + 1)
+
+    def bit(self, pos):
+        return int(pos[0]) * self.height + int(pos[1])
+
+    def foodBits(self, state):
+        food = state.getFood()
+        bits = getattr(food, 'bits', None)
+        if bits is None:
+            from game import BitGrid
+            bits = BitGrid.fromGrid(food).bits
+        return bits
+
+    def ghostTerm(self, pos, ghostStates):
+        """
+        The ghost part of betterEvaluationFunction, None if a ghost that is
+        not scared is next to Pacman.
+        """
+        score = 0
+        for ghost_state in ghostStates:
+            distance = manhattanDistance(pos, ghost_state.getPosition())
+            if ghost_state.scaredTimer > 0:
+                score += 200 / (distance + 1)
+            else:
+                if distance <= 1:
+                    return None
+                score -= 20 / (distance + 1)
+        return score
+
+    def evaluate(self, states):
+        """
+        List of the values of states.
+        """
+        if self.inverse is not None and len(states) > 1:
+            return self.evaluateNumpy(states)
+        return [self.evaluateOne(state) for state in states]
+
+    def foodTerms(self, bits, pos):
+        """
+        (sum of 1/(d+1), smallest d) over the food bits, d the Manhattan
+        distance from pos; the smallest d is float('inf') without food.
+        """
+        rings = self.rings[self.bit(pos)]
+        food = 0
+        nearest = float('inf')
+        if bin(bits).count('1') < len(rings):
+            # little food: cheaper one pellet at a time
+            while bits:
+                low = bits & -bits
+                x, y = divmod(low.bit_length() - 1, self.height)
+                d = abs(x - pos[0]) + abs(y - pos[1])
+                food += 1.0 / (d + 1)
+                if d < nearest:
+                    nearest = d
+                bits ^= low
+        else:
+            for d, weight, mask in rings:
+                if bits & mask:
+                    food += weight * bin(bits & mask).count('1')
+                    if d < nearest:
+                        nearest = d
+        return food, nearest
+
+    def evaluateOne(self, state):
+        pos = state.getPacmanPosition()
+        ghosts = self.ghostTerm(pos, state.getGhostStates())
+        if ghosts is None:
+            return -float('inf')
+        food = self.foodTerms(self.foodBits(state), pos)[0]
+        capsules = 0
+        for capsule in state.getCapsules():
+            capsules += 20 / (manhattanDistance(pos, capsule) + 1)
+        return state.getScore() + 10 * food + ghosts + capsules
+
+    def evaluateNumpy(self, states):
+        n = len(states)
+        nbytes = self.nbytes
+        pacman = numpy.empty(n, dtype=numpy.intp)
+        base = numpy.empty(n)
+        raw = bytearray()
+        for i, state in enumerate(states):
+            pos = state.getPacmanPosition()
+            pacman[i] = self.bit(pos)
+            ghosts = self.ghostTerm(pos, state.getGhostStates())
+            capsules = 0
+            for capsule in state.getCapsules():
+                capsules += 20 / (manhattanDistance(pos, capsule) + 1)
+            base[i] = -float('inf') if ghosts is None else state.getScore() + ghosts + capsules
+            raw += self.foodBits(state).to_bytes(nbytes, 'little')
+        food = numpy.unpackbits(numpy.frombuffer(bytes(raw), dtype=numpy.uint8).reshape(n, nbytes),
+                                axis=1, bitorder='little')[:, :self.size]
+        weights = numpy.einsum('ij,ij->i', self.inverse[pacman], food)
+        return (base + 10 * weights).tolist()
+
+
+def getBatchEvaluator(walls):
+    """
+    The (shared) BatchEvaluator of the layout with these walls.
+    """
+    entry = BATCH_EVALUATOR_CACHE.get(id(walls))
+    if entry is None or entry[0] is not walls:
+        entry = BATCH_EVALUATOR_CACHE[id(walls)] = (walls, BatchEvaluator(walls))
+    return entry[1]
+
+
+def betterEvaluations(states):
+    """
+    betterEvaluationFunction of every state in states (one layout).
+    """
+    if not states:
+        return []
+    return getBatchEvaluator(states[0].getWalls()).evaluate(states)
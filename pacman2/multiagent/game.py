@@ -25,6 +25,8 @@ import time
 import os
 import traceback
 import sys
+import random
+import hashlib
 
 #######################
 # Parts worth reading #
@@ -37,7 +39,12 @@ class Agent:
     following methods which will be called if they exist:
 
     def registerInitialState(self, state): # inspects the starting state
+
+    Agents that only read the states they are given (never change them in
+    place) can set mutatesState = False; Game's fast loop then hands them the
+    game's own state instead of a deep copy.
     """
+    mutatesState = True
 
     def __init__(self, index=0):
         self.index = index
@@ -293,6 +300,125 @@ class Grid:
         return bools
 
 
+class BitGrid:
+    """
+    A boolean Grid stored as the bits of a single Python int (bit x*height+y
+    is cell (x,y)).  It keeps the grid[x][y] interface of Grid, but copy() is
+    O(1) (ints are immutable, a write just replaces self.bits), count() is a
+    popcount, asList() only visits set bits and the hash is the int itself.
+    Used for food, which is copied on every pellet eaten and mostly queried
+    with count()/asList().
+    """
+    __slots__ = ('width', 'height', 'bits')
+
+    def __init__(self, width, height, initialValue=False, bits=0):
+        if initialValue not in [False, True]:
+            raise Exception('Grids can only contain booleans')
+        self.width = width
+        self.height = height
+        self.bits = ((1 << (width * height)) - 1) if initialValue else bits
+
+    @classmethod
+    def fromGrid(cls, grid):
+        g = cls(grid.width, grid.height)
+        for x, y in grid.asList():
+            g.bits |= 1 << (x * grid.height + y)
+        return g
+
+    def __getitem__(self, x):
+        if not 0 <= x < self.width:
+            raise IndexError('BitGrid column index out of range')
+        return _BitColumn(self, x)
+
+    def __setitem__(self, x, column):
+        for y, value in enumerate(column):
+            self.set(x, y, value)
+
+    def __iter__(self):
+        for x in range(self.width):
+            yield _BitColumn(self, x)
+
+    def __len__(self):
+        return self.width
+
+    def get(self, x, y):
+        return (self.bits >> (x * self.height + y)) & 1 == 1
+
+    def set(self, x, y, value):
+        if value:
+            self.bits |= 1 << (x * self.height + y)
+        else:
+            self.bits &= ~(1 << (x * self.height + y))
+
+    def __str__(self):
+        out = [[str(self.get(x, y))[0] for x in range(self.width)]
+               for y in range(self.height)]
+        out.reverse()
+        return '\n'.join([''.join(x) for x in out])
+
+    def __eq__(self, other):
+        if not isinstance(other, BitGrid):
+            return False
+        return self.bits == other.bits and self.height == other.height and self.width == other.width
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def copy(self):
+        return BitGrid(self.width, self.height, bits=self.bits)
+
+    def deepCopy(self):
+        return self.copy()
+
+    def shallowCopy(self):
+        return self.copy()
+
+    def count(self, item=True):
+        ones = bin(self.bits).count('1')
+        return ones if item else self.width * self.height - ones
+
+    def asList(self, key=True):
+        bits = self.bits
+        if not key:
+            bits ^= (1 << (self.width * self.height)) - 1
+        height = self.height
+        list = []
+        while bits:
+            low = bits & -bits
+            list.append(divmod(low.bit_length() - 1, height))
+            bits ^= low
+        return list
+
+
+class _BitColumn:
+    """
+    Column x of a BitGrid, so that grid[x][y] reads and writes the bit.
+    """
+    __slots__ = ('grid', 'x')
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.x = x
+
+    def __getitem__(self, y):
+        grid = self.grid
+        if not 0 <= y < grid.height:
+            raise IndexError('BitGrid row index out of range')
+        return (grid.bits >> (self.x * grid.height + y)) & 1 == 1
+
+    def __setitem__(self, y, value):
+        self.grid.set(self.x, y, value)
+
+    def __len__(self):
+        return self.grid.height
+
+    def __iter__(self):
+        grid = self.grid
+        bits = grid.bits >> (self.x * grid.height)
+        for y in range(grid.height):
+            yield (bits >> y) & 1 == 1
+
+
 def reconstituteGrid(bitRep):
     if type(bitRep) is not type((1, 2)):
         return bitRep
@@ -393,6 +519,131 @@ class Actions:
     getSuccessor = staticmethod(getSuccessor)
 
 
+class MoveTable:
+    """
+    The legal moves of every open cell of a layout, computed once (see
+    CompiledLayout in layout.py):
+
+      pacman[(x, y)]              Pacman's legal directions, in the order of
+                                  Actions.getPossibleActions
+      ghost[((x, y), direction)]  a ghost's legal directions when it arrived
+                                  going direction: no STOP, and no reversal
+                                  unless it is a dead end
+
+    The tuples are shared: copy them before changing them.
+    """
+
+    def __init__(self, walls):
+        self.walls = walls
+        self.pacman = {}
+        self.ghost = {}
+        for x in range(walls.width):
+            for y in range(walls.height):
+                if walls[x][y]:
+                    continue
+                # outside the grid counts as a wall
+                possible = tuple(dir for dir, (dx, dy) in Actions._directionsAsList
+                                 if 0 <= x + dx < walls.width and 0 <= y + dy < walls.height
+                                 and not walls[x + dx][y + dy])
+                self.pacman[(x, y)] = possible
+                for direction in Actions._directions:
+                    legal = [dir for dir in possible if dir != Directions.STOP]
+                    reverse = Actions.reverseDirection(direction)
+                    if reverse in legal and len(legal) > 1:
+                        legal.remove(reverse)
+                    self.ghost[((x, y), direction)] = tuple(legal)
+
+    def pacmanActions(self, pos, direction):
+        legal = self.pacman.get(pos)
+        if legal is None:
+            # between grid points (or off the table): the general rule
+            return tuple(Actions.getPossibleActions(Configuration(pos, direction), self.walls))
+        return legal
+
+    def ghostActions(self, pos, direction):
+        legal = self.ghost.get((pos, direction))
+        if legal is None:
+            possible = [dir for dir in Actions.getPossibleActions(Configuration(pos, direction), self.walls)
+                        if dir != Directions.STOP]
+            reverse = Actions.reverseDirection(direction)
+            if reverse in possible and len(possible) > 1:
+                possible.remove(reverse)
+            return tuple(possible)
+        return legal
+
+
+MASK64 = (1 << 64) - 1
+
+
+def mix64(value):
+    """
+    The splitmix64 finalizer: a cheap, well-distributed mapping of an integer
+    to a 64-bit key.  Used to derive Zobrist keys that don't fit a table.
+    """
+    value = (value + 0x9E3779B97F4A7C15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+class ZobristTable:
+    """
+    Random 64-bit keys for the parts of a game state, seeded by the layout
+    text so every process builds the same keys for the same board.
+
+    A state's key is the XOR of the keys of its food pellets, capsules and
+    agent (position, direction, scaredTimer) triples, so a move only has to
+    XOR out what changed and XOR in its replacement.  The score is folded
+    in when the key is read (see GameStateData.getZobristKey).
+    """
+
+    _DIRECTION_INDEX = {Directions.NORTH: 0, Directions.SOUTH: 1, Directions.EAST: 2,
+                        Directions.WEST: 3, Directions.STOP: 4}
+
+    def __init__(self, layoutText, width, height):
+        digest = hashlib.md5('\n'.join(layoutText).encode()).digest()
+        self.seed = int.from_bytes(digest[:8], 'little')
+        rng = random.Random(self.seed)
+        self.food = [[rng.getrandbits(64) for y in range(height)] for x in range(width)]
+        self.capsule = [[rng.getrandbits(64) for y in range(height)] for x in range(width)]
+        self.agentKeys = {}
+
+    def agentKey(self, index, agentState):
+        """
+        Key of an agent's (position, direction, scaredTimer).  Positions can be
+        half cells for scared ghosts, so these are derived on demand and cached.
+        """
+        conf = agentState.configuration
+        if conf == None:
+            return 0
+        k = (index, conf.pos, conf.direction, agentState.scaredTimer)
+        key = self.agentKeys.get(k)
+        if key is None:
+            x, y = conf.pos
+            packed = ((((index * 8192 + int(2 * x)) * 8192 + int(2 * y)) * 8 +
+                       self._DIRECTION_INDEX.get(conf.direction, 5)) * 1024 + agentState.scaredTimer)
+            key = self.agentKeys[k] = mix64(self.seed ^ packed)
+        return key
+
+    def scoreKey(self, score):
+        return mix64(self.seed ^ 0x5C0E ^ (int(score) & MASK64))
+
+
+ZOBRIST_TABLE_CACHE = {}
+
+
+def getZobristTable(layout):
+    """
+    Returns the (shared) Zobrist table for a layout, building it on first use.
+    """
+    key = layout.textKey
+    table = ZOBRIST_TABLE_CACHE.get(key)
+    if table is None:
+        table = ZobristTable(layout.layoutText, layout.width, layout.height)
+        ZOBRIST_TABLE_CACHE[key] = table
+    return table
+
+
 class GameStateData:
 
     def __init__(self, prevState=None):
@@ -406,11 +657,18 @@ class GameStateData:
             self.layout = prevState.layout
             self._eaten = prevState._eaten
             self.score = prevState.score
+            self.zobristTable = prevState.zobristTable
+            self._zobrist = prevState._zobrist
+        else:
+            self.zobristTable = None
+            self._zobrist = None
 
         self._foodEaten = None
         self._foodAdded = None
         self._capsuleEaten = None
         self._agentMoved = None
+        self._features = None        # StateFeatures (stateFeatures.py), computed on demand
+        self._featureParent = None   # data of the predecessor, with feature tracking on
         self._lose = False
         self._win = False
         self.scoreChange = 0
@@ -452,6 +710,8 @@ class GameStateData:
         """
         Allows states to be keys of dictionaries.
         """
+        if self.zobristTable != None:
+            return self.getZobristKey()
         for i, state in enumerate(self.agentStates):
             try:
                 int(hash(state))
@@ -460,6 +720,56 @@ class GameStateData:
                 # hash(state)
         return int((hash(tuple(self.agentStates)) + 13*hash(self.food) + 113 * hash(tuple(self.capsules)) + 7 * hash(self.score)) % 1048575)
 
+    ###################
+    # Zobrist hashing #
+    ###################
+
+    def getZobristKey(self):
+        """
+        Returns a 64-bit key for this state, suitable as a transposition-table
+        key.  States that compare equal always have the same key.
+        """
+        if self._zobrist == None:
+            self._zobrist = self.computeZobrist()
+        return self._zobrist ^ self.zobristTable.scoreKey(self.score)
+
+    def computeZobrist(self):
+        """
+        Computes the (score-less) Zobrist key from scratch.
+        """
+        table = self.zobristTable
+        key = 0
+        for x, y in self.food.asList():
+            key ^= table.food[x][y]
+        for x, y in self.capsules:
+            key ^= table.capsule[x][y]
+        for index, agentState in enumerate(self.agentStates):
+            key ^= table.agentKey(index, agentState)
+        return key
+
+    def agentKey(self, index):
+        """
+        The Zobrist key of agent index as it is right now.  Rules read it
+        before changing an agent and pass it to rehashAgent afterwards.
+        """
+        if self._zobrist == None:
+            return 0
+        return self.zobristTable.agentKey(index, self.agentStates[index])
+
+    def rehashAgent(self, index, oldKey):
+        if self._zobrist != None:
+            self._zobrist ^= oldKey ^ self.zobristTable.agentKey(index, self.agentStates[index])
+
+    def rehashFood(self, position):
+        if self._zobrist != None:
+            x, y = position
+            self._zobrist ^= self.zobristTable.food[x][y]
+
+    def rehashCapsule(self, position):
+        if self._zobrist != None:
+            x, y = position
+            self._zobrist ^= self.zobristTable.capsule[x][y]
+
     def __str__(self):
         width, height = self.layout.width, self.layout.height
         map = Grid(width, height)
@@ -536,6 +846,8 @@ class GameStateData:
             self.agentStates.append(AgentState(
                 Configuration(pos, Directions.STOP), isPacman))
         self._eaten = [False for a in self.agentStates]
+        self.zobristTable = getZobristTable(layout)
+        self._zobrist = self.computeZobrist()
 
 
 try:
@@ -550,7 +862,8 @@ class Game:
     The Game manages the control flow, soliciting actions from agents.
     """
 
-    def __init__(self, agents, display, rules, startingIndex=0, muteAgents=False, catchExceptions=False):
+    def __init__(self, agents, display, rules, startingIndex=0, muteAgents=False, catchExceptions=False,
+                 fastLoop=False):
         self.agentCrashed = False
         self.agents = agents
         self.display = display
@@ -563,6 +876,7 @@ class Game:
         self.totalAgentTimes = [0 for agent in agents]
         self.totalAgentTimeWarnings = [0 for agent in agents]
         self.agentTimeout = False
+        self.fastLoop = fastLoop
         import io
         self.agentOutput = [io.StringIO() for agent in agents]
 
@@ -602,6 +916,25 @@ class Game:
         sys.stderr = OLD_STDERR
 
     def run(self):
+        """
+        Plays the game with run() or runFast().  Feature tracking (see
+        GameState.setFeatureTracking) is on for the game if an agent sets
+        usesFeatureTracking, and is restored afterwards even if the game
+        raises.
+        """
+        stateClass = type(self.state)
+        saved = getattr(stateClass, 'trackFeatures', None)
+        if saved is not None and any(getattr(agent, 'usesFeatureTracking', False) for agent in self.agents):
+            stateClass.setFeatureTracking(True)
+        try:
+            if self.fastLoop:
+                return self.runFast()
+            return self.runLoop()
+        finally:
+            if saved is not None:
+                stateClass.setFeatureTracking(saved)
+
+    def runLoop(self):
         """
         Main control loop for game play.
         """
@@ -776,3 +1109,141 @@ class Game:
                     self.unmute()
                     return
         self.display.finish()
+
+    def runFast(self):
+        """
+        The same game as runLoop(), for simulation throughput:
+          - agent capabilities are looked up once, not with dir() every turn,
+          - agents with mutatesState = False get the state itself rather than
+            a deep copy,
+          - stdout/stderr are only swapped if muteAgents is set,
+          - with catchExceptions, time limits are checked after each move
+            against time.monotonic() instead of arming a SIGALRM timer, so a
+            move that never returns is not interrupted.
+        Outcomes are identical to runLoop() for agents that respect their time.
+        """
+        self.display.initialize(self.state.data)
+        self.numMoves = 0
+        agents = self.agents
+        numAgents = len(agents)
+        catchExceptions = self.catchExceptions
+        mute = self.muteAgents
+
+        for i, agent in enumerate(agents):
+            if not agent:
+                print("Agent %d failed to load" % i, file=sys.stderr)
+                self._agentCrash(i, quiet=True)
+                return
+        shareState = [getattr(agent, 'mutatesState', True) is False for agent in agents]
+        observe = [getattr(agent, 'observationFunction', None) for agent in agents]
+        getActions = [agent.getAction for agent in agents]
+        moveTimeouts = [self.rules.getMoveTimeout(i) for i in range(numAgents)]
+        warningTimes = [self.rules.getMoveWarningTime(i) for i in range(numAgents)]
+        maxTotalTimes = [self.rules.getMaxTotalTime(i) for i in range(numAgents)]
+
+        def stateFor(i):
+            return self.state if shareState[i] else self.state.deepCopy()
+
+        for i, agent in enumerate(agents):
+            register = getattr(agent, 'registerInitialState', None)
+            if register is None:
+                continue
+            if mute:
+                self.mute(i)
+            try:
+                start_time = time.monotonic()
+                register(stateFor(i))
+                self.totalAgentTimes[i] += time.monotonic() - start_time
+            except Exception:
+                if not catchExceptions:
+                    raise
+                self._agentCrash(i, quiet=False)
+                return
+            finally:
+                if mute:
+                    self.unmute()
+            if catchExceptions and self.totalAgentTimes[i] > self.rules.getMaxStartupTime(i):
+                print("Agent %d ran out of time on startup!" % i, file=sys.stderr)
+                self.agentTimeout = True
+                self._agentCrash(i, quiet=True)
+                return
+
+        agentIndex = self.startingIndex
+        update = self.display.update
+        process = self.rules.process
+        while not self.gameOver:
+            if mute:
+                self.mute(agentIndex)
+            try:
+                start_time = time.monotonic()
+                observation = stateFor(agentIndex)
+                if observe[agentIndex] is not None:
+                    observation = observe[agentIndex](observation)
+                action = getActions[agentIndex](observation)
+                move_time = time.monotonic() - start_time
+            except Exception:
+                if not catchExceptions:
+                    raise
+                self._agentCrash(agentIndex)
+                return
+            finally:
+                if mute:
+                    self.unmute()
+
+            if catchExceptions:
+                if move_time > moveTimeouts[agentIndex]:
+                    print("Agent %d timed out on a single move!" % agentIndex, file=sys.stderr)
+                    self.agentTimeout = True
+                    self._agentCrash(agentIndex, quiet=True)
+                    return
+                if move_time > warningTimes[agentIndex]:
+                    self.totalAgentTimeWarnings[agentIndex] += 1
+                    print("Agent %d took too long to make a move! This is warning %d" % (
+                        agentIndex, self.totalAgentTimeWarnings[agentIndex]), file=sys.stderr)
+                    if self.totalAgentTimeWarnings[agentIndex] > self.rules.getMaxTimeWarnings(agentIndex):
+                        print("Agent %d exceeded the maximum number of warnings: %d" % (
+                            agentIndex, self.totalAgentTimeWarnings[agentIndex]), file=sys.stderr)
+                        self.agentTimeout = True
+                        self._agentCrash(agentIndex, quiet=True)
+                        return
+                self.totalAgentTimes[agentIndex] += move_time
+                if self.totalAgentTimes[agentIndex] > maxTotalTimes[agentIndex]:
+                    print("Agent %d ran out of time! (time: %1.2f)" % (
+                        agentIndex, self.totalAgentTimes[agentIndex]), file=sys.stderr)
+                    self.agentTimeout = True
+                    self._agentCrash(agentIndex, quiet=True)
+                    return
+
+            self.moveHistory.append((agentIndex, action))
+            try:
+                self.state = self.state.generateSuccessor(agentIndex, action)
+            except Exception:
+                if not catchExceptions:
+                    raise
+                self._agentCrash(agentIndex)
+                return
+
+            update(self.state.data)
+            process(self.state, self)
+            agentIndex = (agentIndex + 1) % numAgents
+
+            if _BOINC_ENABLED:
+                boinc.set_fraction_done(self.getProgress())
+
+        for agentIndex, agent in enumerate(agents):
+            final = getattr(agent, 'final', None)
+            if final is None:
+                continue
+            try:
+                if mute:
+                    self.mute(agentIndex)
+                final(self.state)
+            except Exception:
+                if not catchExceptions:
+                    raise
+                self._agentCrash(agentIndex)
+                return
+            finally:
+                if mute:
+                    self.unmute()
+        self.display.finish()
@@ -0,0 +1,239 @@
+# gameRecords.py
+# --------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Compact binary game records, and a headless replay engine for them.
+
+A record is (integers little-endian):
+
+    b'PGR1'
+    u16 length + layout name (utf-8, empty if unknown)
+    8 bytes      start of the md5 of the layout text
+    u16 length + seed (utf-8, empty if unknown)
+    u8           number of ghosts
+    i32          final score
+    u8           outcome: 0 unfinished (timeout/crash), 1 win, 2 loss
+    u32          number of moves
+    one byte per move: agentIndex << 3 | action code (ACTIONS)
+
+Records are self-delimiting, so a file is a stream of games that runGames
+(pacman.py -r) appends to.  Replaying uses RolloutSimulator, which applies
+the game rules in place, so verifying a record takes about a millisecond:
+
+    python gameRecords.py recorded-games-*.pgr
+"""
+
+import hashlib
+import struct
+import sys
+
+from game import Directions
+
+MAGIC = b'PGR1'
+ACTIONS = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST, Directions.STOP]
+ACTION_CODES = dict((action, code) for code, action in enumerate(ACTIONS))
+
+OUTCOMES = ('unfinished', 'win', 'loss')
+
+_TAIL = struct.Struct('<BiBI')
+
+
+class ReplayError(Exception):
+    """
+    A record that does not fit its layout: unknown or changed layout, or an
+    illegal move.
+    """
+    pass
+
+
+def layoutHash(layout):
+    return hashlib.md5(layout.textKey.encode()).digest()[:8]
+
+
+class GameRecord:
+    """
+    One recorded game.  moves holds the packed move bytes.
+    """
+
+    def __init__(self, layoutName, layoutHash, seed, numGhosts, score, outcome, moves):
+        self.layoutName = layoutName
+        self.layoutHash = layoutHash
+        self.seed = seed
+        self.numGhosts = numGhosts
+        self.score = score
+        self.outcome = outcome
+        self.moves = moves
+
+    def fromGame(game, layout, seed=None):
+        """
+        The record of a finished Game (or GameResult) played on layout.
+        """
+        state = game.state
+        outcome = 1 if state.isWin() else 2 if state.isLose() else 0
+        moves = bytes((agentIndex << 3) | ACTION_CODES[action] for agentIndex, action in game.moveHistory)
+        return GameRecord(layout.name or '', layoutHash(layout), seed or '',
+                          state.getNumAgents() - 1, int(state.getScore()), outcome, moves)
+    fromGame = staticmethod(fromGame)
+
+    def actions(self):
+        """
+        The moves as (agentIndex, action) pairs, like Game.moveHistory.
+        """
+        return [(byte >> 3, ACTIONS[byte & 7]) for byte in self.moves]
+
+    def pack(self):
+        name = self.layoutName.encode()
+        seed = self.seed.encode()
+        return b''.join((MAGIC, struct.pack('<H', len(name)), name, self.layoutHash,
+                         struct.pack('<H', len(seed)), seed,
+                         _TAIL.pack(self.numGhosts, self.score, self.outcome, len(self.moves)), self.moves))
+
+    def unpack(buffer, offset=0):
+        """
+        The record at offset in buffer, and the offset after it.
+        """
+        if buffer[offset:offset + 4] != MAGIC:
+            raise ValueError('not a game record at byte %d' % offset)
+        offset += 4
+        length, = struct.unpack_from('<H', buffer, offset)
+        name = bytes(buffer[offset + 2:offset + 2 + length]).decode()
+        offset += 2 + length
+        hash = bytes(buffer[offset:offset + 8])
+        length, = struct.unpack_from('<H', buffer, offset + 8)
+        seed = bytes(buffer[offset + 10:offset + 10 + length]).decode()
+        offset += 10 + length
+        numGhosts, score, outcome, numMoves = _TAIL.unpack_from(buffer, offset)
+        offset += _TAIL.size
+        moves = bytes(buffer[offset:offset + numMoves])
+        if len(moves) != numMoves:
+            raise ValueError('truncated game record')
+        return GameRecord(name, hash, seed, numGhosts, score, outcome, moves), offset + numMoves
+    unpack = staticmethod(unpack)
+
+
+def isRecordFile(filename):
+    with open(filename, 'rb') as f:
+        return f.read(4) == MAGIC
+
+
+def appendRecords(filename, records):
+    with open(filename, 'ab') as f:
+        for record in records:
+            f.write(record.pack())
+
+
+def readRecords(filename):
+    """
+    Yields the GameRecords of a file, in order.
+    """
+    with open(filename, 'rb') as f:
+        buffer = f.read()
+    offset = 0
+    while offset < len(buffer):
+        record, offset = GameRecord.unpack(buffer, offset)
+        yield record
+
+
+class LayoutCache:
+    """
+    Layouts of records, loaded by name once and checked against the hash.
+    """
+
+    def __init__(self, layouts=None):
+        self.layouts = dict(layouts or {})
+
+    def get(self, record):
+        layout = self.layouts.get(record.layoutName)
+        if layout is None:
+            import layout as layoutModule
+            layout = layoutModule.getLayout(record.layoutName) if record.layoutName else None
+            if layout is None:
+                raise ReplayError('unknown layout %r' % record.layoutName)
+            self.layouts[record.layoutName] = layout
+        if layoutHash(layout) != record.layoutHash:
+            raise ReplayError('layout %r is not the one the game was played on' % record.layoutName)
+        return layout
+
+
+def replay(record, layout, visit=None, check=True):
+    """
+    Re-plays a record on layout without a display and returns the
+    RolloutSimulator after the last move.  visit(agentIndex, action,
+    simulator) is called before every move (the simulator changes in place:
+    copy what you keep).  With check, illegal moves raise ReplayError.
+    """
+    from pacman import GameState, SearchState, RolloutSimulator
+    state = GameState()
+    state.initialize(layout, record.numGhosts)
+    simulator = RolloutSimulator(SearchState.fromGameState(state))
+    for index, byte in enumerate(record.moves):
+        if simulator.win or simulator.lose:
+            raise ReplayError('move %d after the end of the game' % index)
+        agentIndex, action = byte >> 3, ACTIONS[byte & 7]
+        if check and action not in simulator.legalActions(agentIndex):
+            raise ReplayError('move %d: illegal action %s for agent %d' % (index, action, agentIndex))
+        if visit is not None:
+            visit(agentIndex, action, simulator)
+        simulator.step(agentIndex, action)
+    return simulator
+
+
+def verify(record, layout):
+    """
+    Replays a record and returns None if it ends with the recorded score and
+    outcome, otherwise a description of the difference.
+    """
+    try:
+        simulator = replay(record, layout)
+    except ReplayError as e:
+        return str(e)
+    outcome = 1 if simulator.win else 2 if simulator.lose else 0
+    if simulator.score != record.score or outcome != record.outcome:
+        return 'replayed %d (%s), recorded %d (%s)' % (simulator.score, OUTCOMES[outcome],
+                                                      record.score, OUTCOMES[record.outcome])
+    return None
+
+
+def verifyFiles(filenames, out=sys.stdout):
+    """
+    Verifies every record of the files; prints the mismatches and a summary
+    and returns the number of records that failed.
+    """
+    import time
+    layouts = LayoutCache()
+    games = failed = moves = 0
+    start = time.perf_counter()
+    for filename in filenames:
+        for i, record in enumerate(readRecords(filename)):
+            games += 1
+            moves += len(record.moves)
+            try:
+                layout = layouts.get(record)
+                error = verify(record, layout)
+            except ReplayError as e:
+                error = str(e)
+            if error is not None:
+                failed += 1
+                out.write('%s game %d: %s\n' % (filename, i + 1, error))
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    out.write('%d games (%d moves) replayed in %.2fs: %.0f games/s, %d mismatches\n' % (
+        games, moves, elapsed, games / elapsed, failed))
+    return failed
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print('usage: python gameRecords.py RECORD_FILE...')
+        sys.exit(2)
+    sys.exit(1 if verifyFiles(sys.argv[1:]) else 0)
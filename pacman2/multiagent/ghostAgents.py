@@ -21,6 +21,8 @@ import util
 
 
 class GhostAgent(Agent):
+    mutatesState = False
+
     def __init__(self, index):
         self.index = index
 
@@ -72,8 +74,8 @@ class DirectionalGhost(GhostAgent):
         pacmanPosition = state.getPacmanPosition()
 
         # Select best actions given the state
-        distancesToPacman = [manhattanDistance(
-            pos, pacmanPosition) for pos in newPositions]
+        distancesToPacman = [self.distance(
+            state, pos, pacmanPosition) for pos in newPositions]
         if isScared:
             bestScore = max(distancesToPacman)
             bestProb = self.prob_scaredFlee
@@ -91,3 +93,13 @@ class DirectionalGhost(GhostAgent):
             dist[a] += (1-bestProb) / len(legalActions)
         dist.normalize()
         return dist
+
+    def distance(self, state, pos1, pos2):
+        return manhattanDistance(pos1, pos2)
+
+
+class MazeDirectionalGhost(DirectionalGhost):
+    "A DirectionalGhost that measures distance through the maze instead of straight-line."
+
+    def distance(self, state, pos1, pos2):
+        return state.getDistanceOracle().getDistance(pos1, pos2)
@@ -13,30 +13,122 @@
 
 
 from util import manhattanDistance
-from game import Grid
+from game import Grid, BitGrid, MoveTable
 import os
 import random
 from functools import reduce
 
 VISIBILITY_MATRIX_CACHE = {}
 
+# layout text (tuple of lines) -> CompiledLayout
+COMPILED_LAYOUTS = {}
 
-class Layout:
+# layout file (absolute path) -> CompiledLayout
+LAYOUT_FILES = {}
+
+
+class CompiledLayout:
     """
-    A Layout manages the static information about the game board.
+    The parsed, immutable parts of a layout, shared by every Layout with the
+    same text: walls, food, capsules, agent start positions, a dense index of
+    the open cells (the numbering of mazeDistances.DistanceOracle) and their
+    legal moves (game.MoveTable).  Do not modify them.
     """
 
     def __init__(self, layoutText):
+        self.layoutText = list(layoutText)
+        self.textKey = '\n'.join(layoutText)
         self.width = len(layoutText[0])
         self.height = len(layoutText)
         self.walls = Grid(self.width, self.height, False)
-        self.food = Grid(self.width, self.height, False)
+        self.food = BitGrid(self.width, self.height, False)
         self.capsules = []
         self.agentPositions = []
         self.numGhosts = 0
         self.processLayoutText(layoutText)
-        self.layoutText = layoutText
-        self.totalFood = len(self.food.asList())
+        self.totalFood = self.food.count()
+        self.openCells = [(x, y) for x in range(self.width) for y in range(self.height) if not self.walls[x][y]]
+        self.cellIndex = dict((cell, i) for i, cell in enumerate(self.openCells))
+        self.moveTable = MoveTable(self.walls)
+
+    def processLayoutText(self, layoutText):
+        """
+        Coordinates are flipped from the input format to the (x,y) convention here
+
+        The shape of the maze.  Each character
+        represents a different type of object.
+         % - Wall
+         . - Food
+         o - Capsule
+         G - Ghost
+         P - Pacman
+        Other characters are ignored.
+        """
+        maxY = self.height - 1
+        for y in range(self.height):
+            for x in range(self.width):
+                layoutChar = layoutText[maxY - y][x]
+                self.processLayoutChar(x, y, layoutChar)
+        self.agentPositions.sort()
+        self.agentPositions = [(i == 0, pos) for i, pos in self.agentPositions]
+
+    def processLayoutChar(self, x, y, layoutChar):
+        if layoutChar == '%':
+            self.walls[x][y] = True
+        elif layoutChar == '.':
+            self.food[x][y] = True
+        elif layoutChar == 'o':
+            self.capsules.append((x, y))
+        elif layoutChar == 'P':
+            self.agentPositions.append((0, (x, y)))
+        elif layoutChar in ['G']:
+            self.agentPositions.append((1, (x, y)))
+            self.numGhosts += 1
+        elif layoutChar in ['1', '2', '3', '4']:
+            self.agentPositions.append((int(layoutChar), (x, y)))
+            self.numGhosts += 1
+
+
+def compileLayout(layoutText):
+    """
+    Returns the (shared) CompiledLayout of a layout text.
+    """
+    key = tuple(layoutText)
+    compiled = COMPILED_LAYOUTS.get(key)
+    if compiled is None:
+        compiled = COMPILED_LAYOUTS[key] = CompiledLayout(key)
+    return compiled
+
+
+class Layout:
+    """
+    A Layout manages the static information about the game board.
+
+    The board itself is a CompiledLayout shared by all the Layouts with the
+    same text, so making a Layout (and deepCopy) does not parse or copy
+    anything.  Its walls, food, capsules and agent lists are the shared
+    ones: treat them as read-only (GameStateData copies what it changes).
+    """
+
+    def __init__(self, layoutText, name=None):
+        self.setCompiled(compileLayout(layoutText))
+        self.name = name  # the name it was loaded by (getLayout)
+
+    def setCompiled(self, compiled):
+        self.compiled = compiled
+        self.width = compiled.width
+        self.height = compiled.height
+        self.walls = compiled.walls
+        self.food = compiled.food
+        self.capsules = compiled.capsules
+        self.agentPositions = compiled.agentPositions
+        self.numGhosts = compiled.numGhosts
+        self.layoutText = compiled.layoutText
+        self.textKey = compiled.textKey
+        self.totalFood = compiled.totalFood
+        self.openCells = compiled.openCells
+        self.cellIndex = compiled.cellIndex
+        self.moveTable = compiled.moveTable
         # self.initializeVisibilityMatrix()
 
     def getNumGhosts(self):
@@ -97,68 +189,42 @@ class Layout:
         return "\n".join(self.layoutText)
 
     def deepCopy(self):
-        return Layout(self.layoutText[:])
-
-    def processLayoutText(self, layoutText):
-        """
-        Coordinates are flipped from the input format to the (x,y) convention here
-
-        The shape of the maze.  Each character
-        represents a different type of object.
-         % - Wall
-         . - Food
-         o - Capsule
-         G - Ghost
-         P - Pacman
-        Other characters are ignored.
-        """
-        maxY = self.height - 1
-        for y in range(self.height):
-            for x in range(self.width):
-                layoutChar = layoutText[maxY - y][x]
-                self.processLayoutChar(x, y, layoutChar)
-        self.agentPositions.sort()
-        self.agentPositions = [(i == 0, pos) for i, pos in self.agentPositions]
-
-    def processLayoutChar(self, x, y, layoutChar):
-        if layoutChar == '%':
-            self.walls[x][y] = True
-        elif layoutChar == '.':
-            self.food[x][y] = True
-        elif layoutChar == 'o':
-            self.capsules.append((x, y))
-        elif layoutChar == 'P':
-            self.agentPositions.append((0, (x, y)))
-        elif layoutChar in ['G']:
-            self.agentPositions.append((1, (x, y)))
-            self.numGhosts += 1
-        elif layoutChar in ['1', '2', '3', '4']:
-            self.agentPositions.append((int(layoutChar), (x, y)))
-            self.numGhosts += 1
+        layout = Layout.__new__(Layout)
+        layout.setCompiled(self.compiled)
+        layout.name = self.name
+        return layout
 
 
 def getLayout(name, back=2):
-    if name.endswith('.lay'):
-        layout = tryToLoad('layouts/' + name)
-        if layout == None:
-            layout = tryToLoad(name)
-    else:
-        layout = tryToLoad('layouts/' + name + '.lay')
-        if layout == None:
-            layout = tryToLoad(name + '.lay')
-    if layout == None and back >= 0:
-        curdir = os.path.abspath('.')
-        os.chdir('..')
-        layout = getLayout(name, back - 1)
-        os.chdir(curdir)
-    return layout
+    """
+    Loads a layout by name (with or without .lay) from layouts/ or the
+    current directory, or from up to back+1 directories above them.  Each
+    file is parsed once (LAYOUT_FILES); every call returns a new Layout
+    sharing the compiled board.
+    """
+    filename = name if name.endswith('.lay') else name + '.lay'
+    for level in range(back + 2):
+        up = os.path.join(*(['..'] * level)) if level else ''
+        for fullname in (os.path.join(up, 'layouts', filename), os.path.join(up, filename)):
+            layout = tryToLoad(fullname)
+            if layout is not None:
+                layout.name = name
+                return layout
+    return None
 
 
 def tryToLoad(fullname):
-    if(not os.path.exists(fullname)):
-        return None
-    f = open(fullname)
-    try:
-        return Layout([line.strip() for line in f])
-    finally:
-        f.close()
+    fullname = os.path.abspath(fullname)
+    compiled = LAYOUT_FILES.get(fullname)
+    if compiled is None:
+        if not os.path.exists(fullname):
+            return None
+        f = open(fullname)
+        try:
+            compiled = LAYOUT_FILES[fullname] = compileLayout([line.strip() for line in f])
+        finally:
+            f.close()
+    layout = Layout.__new__(Layout)
+    layout.setCompiled(compiled)
+    layout.name = None
+    return layout
@@ -0,0 +1,233 @@
+# mazeDistances.py
+# ----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Maze (shortest path) distances for a layout, precomputed once.
+
+A DistanceOracle runs a BFS from every open cell of Layout.walls and keeps
+the results in one uint16 array indexed by dense cell numbers, so a lookup
+is two dictionary reads and an array read.  Oracles are cached per layout
+text; with DISK_CACHE_DIR present they are also stored on disk, so that
+
+    python mazeDistances.py
+
+(which fills the cache for every layout in layouts/) makes the startup free.
+"""
+
+from array import array
+import hashlib
+import math
+import os
+import sys
+
+from game import Actions
+
+UNREACHABLE = 0xFFFF
+
+# Written to only if the directory exists (python mazeDistances.py creates it)
+DISK_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'layouts', '.distances')
+
+DISTANCE_ORACLE_CACHE = {}
+
+
+class DistanceOracle:
+    """
+    All-pairs maze distances of a layout.  Positions are (x, y) tuples; a
+    ghost between two cells (scared ghosts move half steps) is that far from
+    each of them.
+    """
+
+    def __init__(self, walls, table=None, cells=None, index=None):
+        self.width = walls.width
+        self.height = walls.height
+        # Dense numbering of the open cells, in grid[x][y] order (the same as
+        # Layout.openCells / Layout.cellIndex, which are passed in when known)
+        if cells is None:
+            cells = [(x, y) for x in range(walls.width) for y in range(walls.height) if not walls[x][y]]
+            index = dict((cell, i) for i, cell in enumerate(cells))
+        self.cells = cells
+        self.index = index
+        # BitGrid bit of every cell (x*height+y), for nearestFood
+        self.bits = [x * self.height + y for x, y in self.cells]
+        self._rings = {}
+        n = len(self.cells)
+        if table is not None and len(table) == n * n:
+            self.table = table
+        else:
+            self.table = self._computeTable(walls)
+
+    def _computeTable(self, walls):
+        n = len(self.cells)
+        table = array('H', [UNREACHABLE]) * (n * n)
+        neighbors = [[self.index[c] for c in Actions.getLegalNeighbors(cell, walls) if c != cell and c in self.index]
+                     for cell in self.cells]
+        for source in range(n):
+            row = source * n
+            table[row + source] = 0
+            frontier = [source]
+            dist = 0
+            while frontier:
+                dist += 1
+                nextFrontier = []
+                for cell in frontier:
+                    for other in neighbors[cell]:
+                        if table[row + other] == UNREACHABLE:
+                            table[row + other] = dist
+                            nextFrontier.append(other)
+                frontier = nextFrontier
+        return table
+
+    def __len__(self):
+        return len(self.cells)
+
+    def _anchors(self, pos):
+        """
+        The cells a position lies on, with the distance to each.
+        """
+        x, y = pos
+        if x == int(x) and y == int(y):
+            return ((self.index[(int(x), int(y))], 0),)
+        anchors = []
+        for cx in set((math.floor(x), math.ceil(x))):
+            for cy in set((math.floor(y), math.ceil(y))):
+                i = self.index.get((cx, cy))
+                if i is not None:
+                    anchors.append((i, abs(cx - x) + abs(cy - y)))
+        return anchors
+
+    def getDistance(self, pos1, pos2):
+        """
+        Maze distance between two positions, float('inf') if unreachable.
+        """
+        index = self.index
+        i = index.get(pos1)
+        j = index.get(pos2)
+        if i is not None and j is not None:
+            d = self.table[i * len(self.cells) + j]
+            return d if d != UNREACHABLE else float('inf')
+        n = len(self.cells)
+        best = float('inf')
+        for i, offset1 in self._anchors(pos1):
+            for j, offset2 in self._anchors(pos2):
+                d = self.table[i * n + j]
+                if d != UNREACHABLE:
+                    best = min(best, d + offset1 + offset2)
+        return best
+
+    def _ringsFrom(self, source):
+        """
+        For one cell, bitmasks (BitGrid layout) of the cells at distance
+        0-1, 2, 3-4, 5-8, ... and the cells of each ring ordered by distance.
+        Built on the first nearestFood query from that cell.
+        """
+        n = len(self.cells)
+        row = self.table[source * n:(source + 1) * n]
+        order = sorted((d, j) for j, d in enumerate(row) if d != UNREACHABLE)
+        rings = []
+        limit = 1
+        start = 0
+        while start < len(order):
+            end = start
+            mask = 0
+            while end < len(order) and order[end][0] <= limit:
+                mask |= 1 << self.bits[order[end][1]]
+                end += 1
+            if end > start:
+                rings.append((mask, order[start:end]))
+            start = end
+            limit *= 2
+        self._rings[source] = rings
+        return rings
+
+    def nearestFood(self, pos, food):
+        """
+        (distance, position) of the closest pellet by maze distance, or None.
+        food is a BitGrid (or its bits int): whole rings of cells are tested
+        with one AND, and only the first ring with food is scanned in order.
+        """
+        bits = food if isinstance(food, int) else getattr(food, 'bits', None)
+        if bits is None:
+            from game import BitGrid
+            bits = BitGrid.fromGrid(food).bits
+        if not bits:
+            return None
+        best = None
+        for source, offset in self._anchors(pos):
+            rings = self._rings.get(source)
+            if rings is None:
+                rings = self._ringsFrom(source)
+            for mask, cells in rings:
+                if bits & mask:
+                    for d, j in cells:
+                        if (bits >> self.bits[j]) & 1:
+                            if best is None or d + offset < best[0]:
+                                best = (d + offset, self.cells[j])
+                            break
+                    break
+        return best
+
+
+def _cacheFile(key, cacheDir):
+    return os.path.join(cacheDir, hashlib.md5(key.encode()).hexdigest() + '.dist')
+
+
+def getDistanceOracle(layout, cacheDir=None):
+    """
+    Returns the (shared) DistanceOracle of a layout, building it on first
+    use.  The table is read from / written to cacheDir (default
+    DISK_CACHE_DIR) when that directory exists.
+    """
+    key = layout.textKey
+    oracle = DISTANCE_ORACLE_CACHE.get(key)
+    if oracle is not None:
+        return oracle
+    cacheDir = cacheDir or DISK_CACHE_DIR
+    filename = _cacheFile(key, cacheDir)
+    table = None
+    if os.path.exists(filename):
+        table = array('H')
+        with open(filename, 'rb') as f:
+            table.frombytes(f.read())
+        if sys.byteorder != 'little':
+            table.byteswap()
+    oracle = DistanceOracle(layout.walls, table, layout.openCells, layout.cellIndex)
+    if table is not oracle.table and os.path.isdir(cacheDir):
+        data = array('H', oracle.table)
+        if sys.byteorder != 'little':
+            data.byteswap()
+        tmp = filename + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data.tobytes())
+        os.replace(tmp, filename)
+    DISTANCE_ORACLE_CACHE[key] = oracle
+    return oracle
+
+
+if __name__ == '__main__':
+    # Fills the on-disk cache for the given layouts (default: all of layouts/)
+    import layout as layoutModule
+    import time
+    here = os.path.dirname(os.path.abspath(__file__))
+    names = sys.argv[1:] or sorted(f[:-4] for f in os.listdir(os.path.join(here, 'layouts')) if f.endswith('.lay'))
+    if not os.path.isdir(DISK_CACHE_DIR):
+        os.makedirs(DISK_CACHE_DIR)
+    for name in names:
+        lay = layoutModule.getLayout(name)
+        if lay is None:
+            print('%-20s not found' % name)
+            continue
+        start = time.perf_counter()
+        oracle = getDistanceOracle(lay)
+        print('%-20s %4d cells  %7d bytes  %.2fs' % (name, len(oracle), oracle.table.itemsize * len(oracle.table),
+                                                   time.perf_counter() - start))
@@ -0,0 +1,152 @@
+# mazeGraph.py
+# ------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+The maze of a layout with its corridors collapsed.
+
+Most open cells of the classic layouts have exactly two exits: they are
+corridor cells, and an agent in one can only go on or turn back.  A MazeGraph
+keeps only the junctions (cells with one, three or four exits) as nodes; a
+Corridor is the walk from a cell to the next junction in one direction:
+
+    actions   the moves of the walk
+    cells     the cells entered, the junction at the end last
+    length    the number of moves
+    time      the number of rounds the walk takes (every agent moves once a
+              round, Pacman one cell)
+    foodMask  the cells as BitGrid bits (x * height + y); food(bits) is the
+              number of pellets on the way
+
+A macro move of Pacman (MacroMoveAgent in multiAgents.py) is one Corridor.
+Graphs are built from Layout.walls and the layout's MoveTable, and cached
+per layout text.
+"""
+
+from game import Actions, Directions
+
+MAZE_GRAPH_CACHE = {}
+
+
+class Corridor:
+    """
+    A walk from start to the junction end (see the module docstring).
+    """
+    __slots__ = ('start', 'end', 'actions', 'cells', 'length', 'time', 'foodMask')
+
+    def __init__(self, start, actions, cells, height):
+        self.start = start
+        self.end = cells[-1]
+        self.actions = tuple(actions)
+        self.cells = tuple(cells)
+        self.length = len(self.actions)
+        self.time = self.length
+        self.foodMask = 0
+        for x, y in self.cells:
+            self.foodMask |= 1 << (x * height + y)
+
+    def food(self, bits):
+        """
+        The pellets of the food bits that lie on the corridor.
+        """
+        return bin(bits & self.foodMask).count('1')
+
+    def __repr__(self):
+        return 'Corridor(%s -> %s, %d)' % (self.start, self.end, self.length)
+
+
+class MazeGraph:
+    """
+    The junctions of a layout and the corridors between them.  A loop with no
+    junction on it gets one of its cells as a junction, so every walk ends.
+    """
+
+    def __init__(self, walls, moveTable):
+        self.height = walls.height
+        self.moveTable = moveTable
+        # the exits of every cell, without STOP
+        self.exits = dict((cell, tuple(action for action in actions if action != Directions.STOP))
+                          for cell, actions in moveTable.pacman.items())
+        self.junctions = set(cell for cell, exits in self.exits.items() if len(exits) != 2)
+        self._addLoopJunctions()
+        self._corridors = {}
+        self.edges = dict((junction, [self.corridor(junction, action) for action in self.exits[junction]])
+                          for junction in self.junctions)
+
+    def _addLoopJunctions(self):
+        seen = set()
+        for cell in sorted(self.exits):
+            if cell in seen:
+                continue
+            component = [cell]
+            seen.add(cell)
+            hasJunction = False
+            for current in component:
+                hasJunction = hasJunction or current in self.junctions
+                for action in self.exits[current]:
+                    next = self._step(current, action)
+                    if next not in seen:
+                        seen.add(next)
+                        component.append(next)
+            if not hasJunction:
+                self.junctions.add(cell)
+
+    def _step(self, cell, action):
+        dx, dy = Actions.directionToVector(action)
+        return (cell[0] + int(dx), cell[1] + int(dy))
+
+    def isJunction(self, cell):
+        return cell in self.junctions
+
+    def corridor(self, cell, action):
+        """
+        The Corridor that leaves cell (a junction or not) with action.
+        """
+        key = (cell, action)
+        corridor = self._corridors.get(key)
+        if corridor is None:
+            actions, cells = [], []
+            current = cell
+            while True:
+                current = self._step(current, action)
+                actions.append(action)
+                cells.append(current)
+                if current in self.junctions or current == cell:
+                    break
+                # corridor cell: a single way on besides turning back (MoveTable.ghost)
+                action = self.moveTable.ghost[(current, action)][0]
+            corridor = self._corridors[key] = Corridor(cell, actions, cells, self.height)
+        return corridor
+
+    def corridors(self, cell):
+        """
+        The macro moves from a cell: one Corridor per exit.
+        """
+        cell = (int(cell[0]), int(cell[1]))
+        edges = self.edges.get(cell)
+        if edges is not None:
+            return edges
+        return [self.corridor(cell, action) for action in self.exits[cell]]
+
+    def numCorridors(self):
+        return sum(len(edges) for edges in self.edges.values())
+
+
+def getMazeGraph(layout):
+    """
+    Returns the (shared) MazeGraph of a layout, building it on first use.
+    """
+    graph = MAZE_GRAPH_CACHE.get(layout.textKey)
+    if graph is None:
+        graph = MAZE_GRAPH_CACHE[layout.textKey] = MazeGraph(layout.walls, layout.moveTable)
+    return graph
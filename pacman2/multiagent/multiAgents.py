@@ -14,10 +14,11 @@
 
 from util import manhattanDistance
 from game import Directions
-import random, util
+import random, util, time, math
 
 from game import Agent
-from pacman import GameState
+from pacman import GameState, RolloutSimulator
+import batchEvaluation
 
 class ReflexAgent(Agent):
     """
@@ -28,6 +29,7 @@ class ReflexAgent(Agent):
     it in any way you see fit, so long as you don't touch our method
     headers.
     """
+    mutatesState = False  # mono diavazei thn katastash
 
 
     def getAction(self, gameState: GameState):
@@ -101,6 +103,74 @@ def scoreEvaluationFunction(currentGameState: GameState):
     """
     return currentGameState.getScore()
 
+class TranspositionTable:
+    """
+    A bounded cache of search results, keyed by (state key, agent to move).
+
+    Each entry is a tuple (value, depth, bound, bestAction, horizon), where
+    depth is the number of full rounds that were still left below the node,
+    bound says whether value is EXACT, a LOWER bound (the node failed high) or
+    an UPPER bound (the node failed low), and horizon whether the search below
+    reached the depth limit anywhere (False: every leaf was a finished game).
+
+    Replacement is depth-preferred: an entry is only overwritten by a search
+    that went at least as deep.  When the table is full the oldest entry is
+    evicted, so entries from earlier moves of the game go first.
+    """
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, key, depth):
+        """
+        Returns the entry for key if it was searched at least depth rounds deep.
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry[1] < depth:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def bestAction(self, key):
+        """
+        The best move stored for key at any depth (None if unknown).
+        """
+        entry = self.entries.get(key)
+        return entry[3] if entry is not None else None
+
+    def store(self, key, value, depth, bound, bestAction, horizon=True):
+        old = self.entries.get(key)
+        if old is not None:
+            if old[1] > depth:
+                return
+            # ksanagrafetai sto telos, wste h seira na deixnei thn teleutaia eggrafh
+            del self.entries[key]
+        elif len(self.entries) >= self.size:
+            # dicts keep insertion order: the first key is the oldest entry
+            del self.entries[next(iter(self.entries))]
+        self.entries[key] = (value, depth, bound, bestAction, horizon)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def summary(self):
+        probes = max(1, self.hits + self.misses)
+        return 'entries: %d/%d  probes: %d  hits: %d (%.1f%%)' % (
+            len(self.entries), self.size, self.hits + self.misses, self.hits, 100.0 * self.hits / probes)
+
+
 class MultiAgentSearchAgent(Agent):
     """
     This class provides some common elements to all of your
@@ -115,11 +185,122 @@ class MultiAgentSearchAgent(Agent):
     only partially specified, and designed to be extended.  Agent (game.py)
     is another abstract class.
     """
+    mutatesState = False  # h anazhthsh mono paragei diadoxes katastaseis
 
-    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2'):
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2', ttSize = '0', lean = '0', workers = '0',
+                 batch = '0'):
         self.index = 0 # Pacman is always agent index 0
         self.evaluationFunction = util.lookup(evalFn, globals())
         self.depth = int(depth)
+        # transposition table, koino gia oles tis kiniseis enos paixnidiou (0 = xwris TT)
+        self.tt = TranspositionTable(int(ttSize)) if int(ttSize) > 0 else None
+        # lean=1: h anazhthsh ginetai panw se SearchState (pio grhgores diadoxes katastaseis)
+        self.lean = bool(int(lean))
+        # workers>0: kathe kinisi tou pacman sth riza ypologizetai se allo process
+        self.workers = int(workers)
+        self.pool = None
+        self.sharedAlpha = None
+        # batch=1: ta paidia enos komvou pou einai ola fylla vathmologountai mazi (evaluateBatch)
+        self.batch = bool(int(batch))
+        # to Game energopoiei to GameState.setFeatureTracking gia oso diarkei to paixnidi
+        self.usesFeatureTracking = getattr(self.evaluationFunction, 'usesFeatures', False)
+
+    def registerInitialState(self, gameState: GameState):
+        """
+        Called once at the start of every game: the table is per game, and
+        so is the worker pool of the parallel root search.
+        """
+        if self.tt is not None:
+            self.tt.clear()
+        self.closePool()
+        if self.workers > 0:
+            self.openPool()
+
+    def final(self, gameState: GameState):
+        self.closePool()
+
+    def openPool(self):
+        """
+        Starts the processes of the parallel root search.  Each worker gets
+        a copy of this agent (as it is now) and the shared alpha bound.
+        """
+        import multiprocessing
+        self.sharedAlpha = multiprocessing.Value('d', -float('inf'))
+        self.pool = multiprocessing.Pool(self.workers, _initRootWorker, (self, self.sharedAlpha))
+
+    def closePool(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+        self.pool = None
+        self.sharedAlpha = None
+
+    def __getstate__(self):
+        # o pool kai h koinh alpha den antigrafontai stous workers
+        state = self.__dict__.copy()
+        state['pool'] = None
+        state['sharedAlpha'] = None
+        return state
+
+    def rootValue(self, gameState, action, alpha=-float('inf')):
+        """
+        The search value of playing action at the root.  alpha is a value
+        another root action already reaches: a result <= alpha may only be
+        an upper bound.
+        """
+        util.raiseNotDefined()
+
+    def parallelRoot(self, gameState):
+        """
+        Root splitting: the value of every Pacman root action is computed
+        in the worker pool.  Workers raise the shared alpha when they find a
+        better action, and later root actions start from it.
+
+        The action played is the one the sequential search plays: the first
+        legal action with the highest value.  A result at or below the alpha
+        its worker started from is only an upper bound, so if such a result
+        ties the best value ahead of the chosen action, it is searched again
+        with a window just below that value to tell whether it really ties.
+        """
+        self.sharedAlpha.value = -float('inf')
+        actions = gameState.getLegalActions(0)
+        results = self.pool.map(_rootWorkerValue, [(gameState, action) for action in actions], chunksize=1)
+        best = max(value for value, alpha in results)
+        for action, (value, alpha) in zip(actions, results):
+            if value == best and value <= alpha and best > -float('inf'):
+                value = self.rootValue(gameState, action, math.nextafter(best, -float('inf')))
+            if value == best:
+                return action
+        return actions[0]
+
+    def evaluateBatch(self, states):
+        """
+        The evaluations of a list of leaf states, in one call when the
+        evaluation function has a batched version (its batch attribute).
+        """
+        batch = getattr(self.evaluationFunction, 'batch', None)
+        if batch is not None:
+            return batch(states)
+        return [self.evaluationFunction(state) for state in states]
+
+    def stateKey(self, gameState, agentIndex):
+        """
+        Transposition-table key of a node: the state's Zobrist key plus the
+        agent to move.
+        """
+        if hasattr(gameState, 'getZobristKey'):
+            return (gameState.getZobristKey(), agentIndex)
+        return (hash(gameState), agentIndex)
+
+    def searchState(self, gameState):
+        """
+        The state the search starts from: with lean=1 the immutable
+        SearchState (same scores and win/lose flags, no explored tracking),
+        otherwise the GameState itself.
+        """
+        if self.lean and hasattr(gameState, 'getSearchState'):
+            return gameState.getSearchState()
+        return gameState
 
 class MinimaxAgent(MultiAgentSearchAgent):
     """
@@ -149,9 +330,32 @@ class MinimaxAgent(MultiAgentSearchAgent):
         gameState.isLose():
         Returns whether or not the game state is a losing state
         """
-        agentIndex = self.index
-
+        gameState = self.searchState(gameState)
+        if self.pool is not None:
+            return self.parallelRoot(gameState)
+        minmax = self.search()
+        # ilopoihsh epilogis kinisis me vasi to minimax
         
+        best_score = -float('inf')
+        best_action = None
+        
+        for action in gameState.getLegalActions(0):
+            successor = gameState.generateSuccessor(0, action)
+            eval = minmax(1, 0, successor)
+            if eval > best_score or best_action is None:  # akoma kai an oles xanoun (-inf), paizoume kati
+                best_score = eval
+                best_action = action
+        return best_action
+
+    def rootValue(self, gameState, action, alpha=-float('inf')):
+        return self.search()(1, 0, gameState.generateSuccessor(0, action))
+
+    def search(self):
+        """
+        Returns the recursive minimax function minmax(agentIndex, depth, gameState).
+        """
+        tt = self.tt
+
         #nested function gia minimax anadromiko algorithmo
         def minmax(agentIndex, depth, gameState):
             next_agent = (agentIndex + 1) % gameState.getNumAgents() 
@@ -162,103 +366,360 @@ class MinimaxAgent(MultiAgentSearchAgent):
             
             if depth == self.depth or gameState.isWin() or gameState.isLose():
                 return self.evaluationFunction(gameState)
+
+            if tt is not None:  # to exoume ksanadei se idio h megalytero vathos?
+                key = self.stateKey(gameState, agentIndex)
+                entry = tt.probe(key, self.depth - depth)
+                if entry is not None:
+                    return entry[0]
             
-            if agentIndex == 0:  # seira pacman/MAX
-                max_val = -float('inf')
+            best_action = None
+            if self.batch and next_depth == self.depth:
+                # ola ta paidia einai fylla: vathmologountai mazi
+                values = self.evaluateBatch([gameState.generateSuccessor(agentIndex, action) for action in moves])
+                value = max(values) if agentIndex == 0 else min(values)
+                best_action = moves[values.index(value)]
+            elif agentIndex == 0:  # seira pacman/MAX
+                value = -float('inf')
                 for action in moves:
                     successor = gameState.generateSuccessor(agentIndex, action)
-                    max_val = max(max_val, minmax(next_agent, next_depth, successor))
-                return max_val
+                    val = minmax(next_agent, next_depth, successor)
+                    if val > value:
+                        value, best_action = val, action
             else:  # seira fantasmatos/MIN
-                min_val = float('inf')
+                value = float('inf')
                 for action in moves:
                     successor = gameState.generateSuccessor(agentIndex  , action)
-                    min_val = min(min_val, minmax(next_agent, next_depth, successor))
-                return min_val
-        # ilopoihsh epilogis kinisis me vasi to minimax
-        
-        best_score = -float('inf')
-        best_action = None
-        
-        for action in gameState.getLegalActions(0):
-            successor = gameState.generateSuccessor(0, action)
-            eval = minmax(1, 0, successor)
-            if eval > best_score:
-                best_score = eval
-                best_action = action
-        return best_action
+                    val = minmax(next_agent, next_depth, successor)
+                    if val < value:
+                        value, best_action = val, action
+
+            if tt is not None:
+                tt.store(key, value, self.depth - depth, TranspositionTable.EXACT, best_action)
+            return value
+        return minmax
+
+class SearchTimeout(Exception):
+    """
+    Raised inside a search when the per-move time budget has run out.
+    """
+    pass
+
 
 class AlphaBetaAgent(MultiAgentSearchAgent):
     """
     Your minimax agent with alpha-beta pruning (question 3)
+
+    With moveTime > 0 (seconds, e.g. -a moveTime=0.5) the agent searches
+    with iterative deepening: depth 1, 2, ... until the budget runs out (or
+    maxDepth is reached) and plays the best move of the deepest search that
+    finished.  Each iteration tries the previous principal variation first.
+
+    With ordering=1, moves at Pacman and ghost nodes are tried in the order:
+    PV move, transposition-table move, killer moves of that ply, then by the
+    history table.  Cutoff counts per node type are kept in self.stats
+    (printed at the end of each game with stats=1, with the hit rate of the
+    transposition table).
     """
 
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2', ttSize = '0',
+                 moveTime = '0', maxDepth = '64', ordering = '0', stats = '0', lean = '0', workers = '0'):
+        MultiAgentSearchAgent.__init__(self, evalFn, depth, ttSize, lean, workers)
+        self.moveTime = float(moveTime)
+        self.maxDepth = int(maxDepth)
+        self.lastDepth = 0
+        self.ordering = bool(int(ordering))
+        self.printStats = bool(int(stats))
+        self.killers = {}   # ply -> [killer1, killer2]
+        self.history = {}   # (agentIndex, position, action) -> score
+        self.resetStats()
+
+    def resetStats(self):
+        """
+        Node and cutoff counters for Pacman (MAX) and ghost (MIN) nodes.
+        firstCutoffs counts cutoffs caused by the first move tried; with
+        perfect ordering every cutoff is a first-move cutoff.
+        """
+        self.stats = {
+            'pacman': {'nodes': 0, 'cutoffs': 0, 'firstCutoffs': 0, 'children': 0},
+            'ghost': {'nodes': 0, 'cutoffs': 0, 'firstCutoffs': 0, 'children': 0},
+        }
+
+    def registerInitialState(self, gameState: GameState):
+        MultiAgentSearchAgent.registerInitialState(self, gameState)
+        self.killers = {}
+        self.history = {}
+        self.resetStats()
+
+    def final(self, gameState: GameState):
+        MultiAgentSearchAgent.final(self, gameState)
+        if self.printStats:
+            for kind in ('pacman', 'ghost'):
+                s = self.stats[kind]
+                nodes = max(1, s['nodes'])
+                cutoffs = max(1, s['cutoffs'])
+                print('%-6s nodes: %d  cutoffs: %d (%.1f%% of nodes)  first-move cutoffs: %.1f%%  avg children searched: %.2f' % (
+                    kind, s['nodes'], s['cutoffs'], 100.0 * s['cutoffs'] / nodes,
+                    100.0 * s['firstCutoffs'] / cutoffs, s['children'] / float(nodes)))
+            if self.tt is not None:
+                print('TT     ' + self.tt.summary())
+
+    def historyKey(self, gameState, agentIndex, action):
+        if hasattr(gameState, 'getPacmanPosition'):
+            position = gameState.getPacmanPosition() if agentIndex == 0 else gameState.getGhostPosition(agentIndex)
+            return (agentIndex, position, action)
+        return (agentIndex, None, action)
+
+    def recordCutoff(self, gameState, agentIndex, action, ply, remaining):
+        """
+        A move that caused a cutoff becomes a killer for its ply and gains
+        history score (deeper cutoffs weigh more).
+        """
+        killers = self.killers.setdefault(ply, [])
+        if action not in killers:
+            killers.insert(0, action)
+            del killers[2:]
+        key = self.historyKey(gameState, agentIndex, action)
+        self.history[key] = self.history.get(key, 0) + remaining * remaining
+
     def getAction(self, gameState: GameState):
         """
         Returns the minimax action using self.depth and self.evaluationFunction
         """
+        gameState = self.searchState(gameState)
+        if self.moveTime > 0:
+            return self.iterativeDeepening(gameState)
+        if self.pool is not None:
+            return self.parallelRoot(gameState)
+        self.ageHistory()
+        return self.searchRoot(gameState, self.depth)[0]
+
+    def ageHistory(self):
+        """
+        New move: killers are ply-relative so they start over, and the history
+        scores are halved so older evidence fades.
+        """
+        self.killers = {}
+        for key in list(self.history):
+            self.history[key] >>= 1
+            if not self.history[key]:
+                del self.history[key]
+
+    def iterativeDeepening(self, gameState):
+        """
+        Deepens one round at a time until the time budget runs out.  Depth 1
+        always completes, so there is always a move to play.
+        """
+        self.ageHistory()
+        deadline = time.perf_counter() + self.moveTime
+        best_action = None
+        pv = []
+        depth = 1
+        while depth <= self.maxDepth:
+            try:
+                action, pv, cutoff = self.searchRoot(gameState, depth, deadline if depth > 1 else None, pv)
+            except SearchTimeout:
+                break
+            best_action = action
+            self.lastDepth = depth
+            if not cutoff:  # ola ta fylla htan telikes katastaseis, den exei noima na pame vathytera
+                break
+            depth += 1
+        return best_action
+
+    def rootValue(self, gameState, action, alpha=-float('inf')):
+        self.searchRoot(gameState, self.depth, actions=[action], alpha=alpha)
+        return self.rootScore
+
+    def searchRoot(self, gameState, maxDepth, deadline=None, pv=(), actions=None, alpha=-float('inf')):
+        """
+        One alpha-beta search maxDepth rounds deep.
+
+        Returns (best action, principal variation, cutoff) where cutoff says
+        whether any leaf was cut off by depth rather than by the game ending.
+        With a deadline, raises SearchTimeout once time.perf_counter() passes it.
+        """
         agentIndex = self.index
+        tt = self.tt
+        pv_line = {}  # ply -> h kalyterh grammh kinisewn apo ekei kai katw
+        cutoff = [False]
+
+        ordering = self.ordering
+        stats = self.stats
+
+        def ordered(moves, ply, onPV, agentIndex=0, gameState=None, ttMove=None):
+            if not ordering:
+                # an eimaste panw sthn prohgoumenh PV, dokimazoume prwta th dikh ths kinisi
+                if onPV and ply < len(pv) and pv[ply] in moves:
+                    return [pv[ply]] + [m for m in moves if m != pv[ply]]
+                return moves
+            # seira: PV, kinisi tou TT, killers tou ply, kai meta kata history
+            first = []
+            if onPV and ply < len(pv):
+                first.append(pv[ply])
+            if ttMove is not None:
+                first.append(ttMove)
+            first.extend(self.killers.get(ply, ()))
+            front = []
+            for m in first:
+                if m in moves and m not in front:
+                    front.append(m)
+            rest = [m for m in moves if m not in front]
+            if gameState is not None:
+                history = self.history
+                rest.sort(key=lambda m: -history.get(self.historyKey(gameState, agentIndex, m), 0))
+            return front + rest
 
         
         #nested function gia minimax anadromiko algorithmo
-        def alphabeta(agentIndex, depth, gameState, alpha, beta):
+        def alphabeta(agentIndex, depth, gameState, alpha, beta, ply=1, onPV=False):
+            if deadline is not None and time.perf_counter() >= deadline:
+                raise SearchTimeout()
+            pv_line[ply] = []
+
             next_agent = (agentIndex + 1) % gameState.getNumAgents() 
         
             next_depth = depth + 1 if next_agent == 0 else depth
         
             moves = gameState.getLegalActions(agentIndex)
             
-            if depth == self.depth or gameState.isWin() or gameState.isLose():
+            if depth == maxDepth or gameState.isWin() or gameState.isLose():
+                if depth == maxDepth and not (gameState.isWin() or gameState.isLose()):
+                    cutoff[0] = True
                 return self.evaluationFunction(gameState)
+
+            if tt is not None:
+                key = self.stateKey(gameState, agentIndex)
+                entry = tt.probe(key, maxDepth - depth)
+                if entry is not None:
+                    value, _, bound, _, horizon = entry
+                    # an to apothikeumeno ypodentro eftase sto orio vathous, to idio kai h twrinh anazhthsh
+                    if horizon:
+                        cutoff[0] = True
+                    # akrivis timh, h fragma pou odhgei hdh se kladema
+                    if bound == TranspositionTable.EXACT:
+                        return value
+                    if bound == TranspositionTable.LOWER and value > beta:
+                        return value
+                    if bound == TranspositionTable.UPPER and value < alpha:
+                        return value
+                alpha_orig, beta_orig = alpha, beta
+
+            ttMove = tt.bestAction(key) if (tt is not None and ordering) else None
+            moves = ordered(moves, ply, onPV, agentIndex, gameState, ttMove)
+            # to cutoff metriete xwrista gia to ypodentro, gia na apothikeutei sto TT
+            outer_cutoff = cutoff[0]
+            cutoff[0] = False
             
+            best_action = None
             if agentIndex == 0:  # seira pacman/MAX
+                s = stats['pacman']
+                s['nodes'] += 1
                 max_val = -float('inf')
-                for action in moves:
+                for i, action in enumerate(moves):
+                    s['children'] += 1
                     successor = gameState.generateSuccessor(agentIndex, action)
-                    val  = alphabeta(next_agent, next_depth, successor, alpha, beta)
+                    val  = alphabeta(next_agent, next_depth, successor, alpha, beta, ply + 1, onPV and i == 0)
+                    if val > max_val:
+                        best_action = action
+                        pv_line[ply] = [action] + pv_line[ply + 1]
                     max_val = max(max_val, val)
                     alpha = max(alpha, max_val)
                     if max_val > beta:
-                        return max_val
+                        s['cutoffs'] += 1
+                        if i == 0:
+                            s['firstCutoffs'] += 1
+                        if ordering:
+                            self.recordCutoff(gameState, agentIndex, action, ply, maxDepth - depth)
+                        break
                     
                     alpha = max(alpha, max_val)#ananewsh alpha
                     
-                return max_val
+                value = max_val
             else:  # seira fantasmatos/MIN
+                s = stats['ghost']
+                s['nodes'] += 1
                 min_val = float('inf')
-                for action in moves:
+                for i, action in enumerate(moves):
+                    s['children'] += 1
                     successor = gameState.generateSuccessor(agentIndex  , action)
-                    val = alphabeta(next_agent, next_depth, successor, alpha, beta)
+                    val = alphabeta(next_agent, next_depth, successor, alpha, beta, ply + 1, onPV and i == 0)
+                    if val < min_val:
+                        best_action = action
+                        pv_line[ply] = [action] + pv_line[ply + 1]
                     min_val = min(min_val, val)
                     beta = min(beta, min_val)
                     if min_val < alpha:
-                        return min_val
+                        s['cutoffs'] += 1
+                        if i == 0:
+                            s['firstCutoffs'] += 1
+                        if ordering:
+                            self.recordCutoff(gameState, agentIndex, action, ply, maxDepth - depth)
+                        break
                     
                     beta = min(beta, min_val) #ananewsh beta
                     
-                return min_val
+                value = min_val
+
+            horizon = cutoff[0]
+            cutoff[0] = outer_cutoff or horizon
+            if tt is not None:
+                # fail-soft: ektos parathyrou (alpha, beta) h timh einai mono fragma
+                if value <= alpha_orig:
+                    bound = TranspositionTable.UPPER
+                elif value >= beta_orig:
+                    bound = TranspositionTable.LOWER
+                else:
+                    bound = TranspositionTable.EXACT
+                tt.store(key, value, maxDepth - depth, bound, best_action, horizon)
+            return value
         #ilopoihsh epilogis kinisis me vasi to alphabeta
-        alpha = -float('inf')   
         beta = float('inf')
         best_score = -float('inf')
         best_action = None
+        best_line = []
         
-        for action in gameState.getLegalActions(0):
+        root_tt_move = tt.bestAction(self.stateKey(gameState, 0)) if (tt is not None and ordering) else None
+        if actions is None:
+            actions = gameState.getLegalActions(0)
+        for i, action in enumerate(ordered(actions, 0, True, 0, gameState, root_tt_move)):
             successor = gameState.generateSuccessor(0, action)
-            eval = alphabeta(1, 0, successor, alpha, beta)
-            if eval > best_score:
+            eval = alphabeta(1, 0, successor, alpha, beta, 1, i == 0)
+            if eval > best_score or best_action is None:  # akoma kai an oles xanoun (-inf), paizoume kati
                 best_score = eval
                 best_action = action
+                best_line = [action] + pv_line[1]
             if best_score > beta:
-                return best_action
+                break
             alpha = max(alpha, best_score) #ananewsh alpha gia thn epomenh kinisi
-        return best_action
+        self.rootScore = best_score
+        return best_action, best_line, cutoff[0]
 
 class ExpectimaxAgent(MultiAgentSearchAgent):
     """
       Your expectimax agent (question 4)
+
+    With star=1 or star=2 chance nodes are pruned with Star1 / Star2, using
+    the declared bounds evalMin <= evaluation <= evalMax (with relative=1
+    they are offsets from the score of the state being searched from).
+    Evaluations outside the bounds are clipped to them.  Star2 also probes
+    one Pacman move below each ghost reply of the last ghost first.  The
+    transposition table is not used in these modes.
+
+    With sampleGhosts=N, a chance node with more than N ghost moves averages
+    over N of them chosen at random.
     """
 
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2', ttSize = '0', lean = '0', workers = '0',
+                 star = '0', evalMin = '-inf', evalMax = 'inf', relative = '0', sampleGhosts = '0', batch = '0'):
+        MultiAgentSearchAgent.__init__(self, evalFn, depth, ttSize, lean, workers, batch)
+        self.star = int(star)
+        self.evalMin = float(evalMin)
+        self.evalMax = float(evalMax)
+        self.relative = bool(int(relative))
+        self.sampleGhosts = int(sampleGhosts)
+        self.nodes = 0
+
     def getAction(self, gameState: GameState):
         """
         Returns the expectimax action using self.depth and self.evaluationFunction
@@ -266,6 +727,36 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
         All ghosts should be modeled as choosing uniformly at random from their
         legal moves.
         """
+        gameState = self.searchState(gameState)
+        if self.pool is not None:
+            return self.parallelRoot(gameState)
+        if self.star:
+            return self.starRoot(gameState)
+        expectimax = self.search()
+        # ilopoihsh epilogis kinisis me vasi to expectimax
+        best_score = -float('inf')
+        best_action = None
+        
+        for action in gameState.getLegalActions(0):
+            successor = gameState.generateSuccessor(0, action)
+            eval = expectimax(1, 0, successor)
+            if eval > best_score or best_action is None:  # akoma kai an oles xanoun (-inf), paizoume kati
+                best_score = eval
+                best_action = action
+        return best_action
+
+    def rootValue(self, gameState, action, alpha=-float('inf')):
+        if self.star:
+            return self.starSearch(gameState)(1, 0, gameState.generateSuccessor(0, action), alpha, float('inf'))
+        return self.search()(1, 0, gameState.generateSuccessor(0, action))
+
+    def search(self):
+        """
+        Returns the recursive expectimax function expectimax(agentIndex, depth, gameState).
+        """
+        tt = self.tt
+        sample = self.sampleGhosts
+
         def expectimax(agentIndex, depth, gameState):
             next_agent = (agentIndex + 1) % gameState.getNumAgents() 
         
@@ -275,34 +766,562 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
             
             if depth == self.depth or gameState.isWin() or gameState.isLose():
                 return self.evaluationFunction(gameState)
+
+            if tt is not None:
+                key = self.stateKey(gameState, agentIndex)
+                entry = tt.probe(key, self.depth - depth)
+                if entry is not None:
+                    return entry[0]
             
-            if agentIndex == 0:  # seira pacman/MAX
+            best_action = None
+            if agentIndex != 0 and sample and len(moves) > sample:
+                moves = random.sample(moves, sample)
+            if self.batch and next_depth == self.depth:
+                # ola ta paidia einai fylla: vathmologountai mazi
+                values = self.evaluateBatch([gameState.generateSuccessor(agentIndex, action) for action in moves])
+                if agentIndex == 0:
+                    value = max(values)
+                    best_action = moves[values.index(value)]
+                else:
+                    value = sum(values) * (1 / len(moves))
+            elif agentIndex == 0:  # seira pacman/MAX
                 max_val = -float('inf')
                 for action in moves:
                     successor = gameState.generateSuccessor(agentIndex, action)
-                    max_val = max(max_val, expectimax(next_agent, next_depth, successor))
-                return max_val
+                    val = expectimax(next_agent, next_depth, successor)
+                    if val > max_val:
+                        max_val, best_action = val, action
+                value = max_val
             else:  # seira fantasmatos/EXPECTATION
                 total_val = 0
+                possibilities = 1 / len(moves)
                 for action in moves:
-                    possibilities = 1 / len(moves)
                     successor = gameState.generateSuccessor(agentIndex  , action)
                     total_val += expectimax(next_agent, next_depth, successor)
                 expected_val = total_val * possibilities
-                return expected_val
-        # ilopoihsh epilogis kinisis me vasi to expectimax
+                value = expected_val
+
+            if tt is not None:
+                tt.store(key, value, self.depth - depth, TranspositionTable.EXACT, best_action)
+            return value
+        return expectimax
+
+    def starRoot(self, gameState):
+        """
+        Root of the Star1/Star2 search: like the plain root, every action
+        after the first only has to beat the best value so far.
+        """
+        search = self.starSearch(gameState)
         best_score = -float('inf')
         best_action = None
-        
         for action in gameState.getLegalActions(0):
             successor = gameState.generateSuccessor(0, action)
-            eval = expectimax(1, 0, successor)
-            if eval > best_score:
+            eval = search(1, 0, successor, best_score, float('inf'))
+            if eval > best_score or best_action is None:
                 best_score = eval
                 best_action = action
         return best_action
+
+    def starSearch(self, rootState):
+        """
+        Returns star(agentIndex, depth, gameState, alpha, beta), expectimax
+        with Star1 (and with star=2, Star2) pruning.  The result is exact
+        when it lies strictly inside (alpha, beta); otherwise it is a bound
+        on the same side of the window.
+        """
+        low, high = self.evalMin, self.evalMax
+        if self.relative:
+            low += rootState.getScore()
+            high += rootState.getScore()
+        sample = self.sampleGhosts
+        probing = self.star >= 2 and low > -float('inf')
+        evaluate = self.evaluationFunction
+
+        def star(agentIndex, depth, gameState, alpha, beta, probed=None):
+            self.nodes += 1
+            if depth == self.depth or gameState.isWin() or gameState.isLose():
+                return min(high, max(low, evaluate(gameState)))
+            next_agent = (agentIndex + 1) % gameState.getNumAgents()
+            next_depth = depth + 1 if next_agent == 0 else depth
+            moves = gameState.getLegalActions(agentIndex)
+
+            if agentIndex == 0:  # seira pacman/MAX
+                value = -float('inf')
+                for action in moves:
+                    if probed is not None and action == probed[0]:
+                        val = probed[1]  # akrivis timi apo to probe tou Star2
+                    else:
+                        val = star(next_agent, next_depth, gameState.generateSuccessor(0, action), max(alpha, value), beta)
+                    if val > value:
+                        value = val
+                        if value >= beta:
+                            break
+                return value
+
+            # seira fantasmatos/EXPECTATION me Star1/Star2
+            if sample and len(moves) > sample:
+                moves = random.sample(moves, sample)
+            n = len(moves)
+            possibilities = 1 / n
+            successors = [None] * n
+            lower = [low] * n  # kato oria twn paidiwn (to Star2 ta anevazei)
+            probes = [None] * n
+
+            if probing and next_agent == 0 and next_depth < self.depth:
+                # Star2: mia kinisi tou pacman se kathe paidi dinei kato orio tou max komvou
+                known = (n - 1) * low
+                for i, action in enumerate(moves):
+                    child = successors[i] = gameState.generateSuccessor(agentIndex, action)
+                    if child.isWin() or child.isLose():
+                        continue
+                    probe_beta = n * beta - known
+                    first = child.getLegalActions(0)[0]
+                    val = star(1, next_depth, child.generateSuccessor(0, first), low, probe_beta)
+                    if val >= probe_beta:
+                        return (known + val) * possibilities
+                    # katw apo to probe_beta i timi einai akrivis (oi times den pane katw apo to low)
+                    probes[i] = (first, val)
+                    lower[i] = max(low, val)
+                    known += lower[i] - low
+
+            total = 0
+            for i, action in enumerate(moves):
+                rest_low = sum(lower[i + 1:])
+                rest_high = (n - i - 1) * high
+                child_alpha = n * alpha - total - rest_high
+                child_beta = n * beta - total - rest_low
+                if child_alpha >= high:
+                    return (total + rest_high + high) * possibilities
+                if child_beta <= lower[i]:
+                    return (total + lower[i] + rest_low) * possibilities
+                child = successors[i] or gameState.generateSuccessor(agentIndex, action)
+                val = star(next_agent, next_depth, child, max(low, child_alpha), min(high, child_beta), probes[i])
+                total += val
+                if child_alpha > low and val <= child_alpha:
+                    return (total + rest_high) * possibilities
+                if child_beta < high and val >= child_beta:
+                    return (total + rest_low) * possibilities
+            return total * possibilities
+
+        return star
     
 
+def moveGhostsGreedily(gameState, ghosts):
+    """
+    The state after each of the ghosts, in turn, makes the move that brings
+    it closest to Pacman in maze distance (furthest away when scared).
+    """
+    oracle = gameState.getDistanceOracle()
+    for ghost in ghosts:
+        if gameState.isWin() or gameState.isLose():
+            break
+        pacman = gameState.getPacmanPosition()
+        sign = -1 if gameState.getGhostState(ghost).scaredTimer > 0 else 1
+        successors = [gameState.generateSuccessor(ghost, action) for action in gameState.getLegalActions(ghost)]
+        gameState = min(successors, key=lambda s: sign * oracle.getDistance(s.getGhostPosition(ghost), pacman))
+    return gameState
+
+
+class ReducedGhostSearchAgent(MultiAgentSearchAgent):
+    """
+    Alpha-beta search in rounds (one Pacman move, then the ghosts) that does
+    not branch on every ghost.  Ghosts further than cutoff maze steps from
+    Pacman (0 = no cutoff) do not branch: with farGhosts='freeze' they stay
+    where they are, with farGhosts='greedy' they make the move that brings
+    them closest to Pacman (furthest away when scared).  The ghosts in range
+    are searched as set by the subclass (searchGhosts).
+
+    depth is the number of rounds, as for the other agents.
+    """
+
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2', cutoff = '0', farGhosts = 'freeze',
+                 lean = '0', workers = '0'):
+        MultiAgentSearchAgent.__init__(self, evalFn, depth, '0', lean, workers)
+        self.cutoff = float(cutoff)
+        if farGhosts not in ('freeze', 'greedy'):
+            raise Exception('farGhosts must be freeze or greedy, not %s' % farGhosts)
+        self.farGhosts = farGhosts
+
+    def getAction(self, gameState: GameState):
+        gameState = self.searchState(gameState)
+        if self.pool is not None:
+            return self.parallelRoot(gameState)
+        best_score = -float('inf')
+        best_action = None
+        for action in gameState.getLegalActions(0):
+            eval = self.rootValue(gameState, action, best_score)
+            if eval > best_score or best_action is None:
+                best_score = eval
+                best_action = action
+        return best_action
+
+    def rootValue(self, gameState, action, alpha=-float('inf')):
+        return self.ghostRound(gameState.generateSuccessor(0, action), 0, alpha, float('inf'))
+
+    def splitGhosts(self, gameState):
+        """
+        The ghosts within the cutoff of Pacman, and the others.
+        """
+        ghosts = range(1, gameState.getNumAgents())
+        if self.cutoff <= 0:
+            return list(ghosts), []
+        oracle = gameState.getDistanceOracle()
+        pacman = gameState.getPacmanPosition()
+        near, far = [], []
+        for ghost in ghosts:
+            if oracle.getDistance(gameState.getGhostPosition(ghost), pacman) <= self.cutoff:
+                near.append(ghost)
+            else:
+                far.append(ghost)
+        return near, far
+
+    def moveFarGhosts(self, gameState, far):
+        if self.farGhosts == 'freeze':
+            return gameState
+        return moveGhostsGreedily(gameState, far)
+
+    def maxValue(self, gameState, depth, alpha, beta):
+        if depth == self.depth or gameState.isWin() or gameState.isLose():
+            return self.evaluationFunction(gameState)
+        value = -float('inf')
+        for action in gameState.getLegalActions(0):
+            value = max(value, self.ghostRound(gameState.generateSuccessor(0, action), depth, alpha, beta))
+            if value > beta:
+                return value
+            alpha = max(alpha, value)
+        return value
+
+    def ghostRound(self, gameState, depth, alpha, beta):
+        """
+        Value of a state with the ghosts of round depth to move.
+        """
+        if gameState.isWin() or gameState.isLose():
+            return self.evaluationFunction(gameState)
+        near, far = self.splitGhosts(gameState)
+        if not near:
+            return self.maxValue(self.moveFarGhosts(gameState, far), depth + 1, alpha, beta)
+        return self.searchGhosts(gameState, near, far, depth, alpha, beta)
+
+    def searchGhosts(self, gameState, near, far, depth, alpha, beta):
+        util.raiseNotDefined()
+
+
+class BestReplyAgent(ReducedGhostSearchAgent):
+    """
+    Best-Reply Search: in every round only one of the ghosts in range moves,
+    the one whose best reply is worst for Pacman.  A round has one MIN layer
+    of (ghost, action) replies instead of one layer per ghost.
+    """
+
+    def searchGhosts(self, gameState, near, far, depth, alpha, beta):
+        value = float('inf')
+        for ghost in near:
+            for action in gameState.getLegalActions(ghost):
+                successor = self.moveFarGhosts(gameState.generateSuccessor(ghost, action), far)
+                if successor.isWin() or successor.isLose():
+                    val = self.evaluationFunction(successor)
+                else:
+                    val = self.maxValue(successor, depth + 1, alpha, beta)
+                value = min(value, val)
+                if value < alpha:
+                    return value
+                beta = min(beta, value)
+        return value
+
+
+class DistanceCutoffAgent(ReducedGhostSearchAgent):
+    """
+    Alpha-beta with a MIN layer for every ghost within cutoff maze steps of
+    Pacman (default 6); the ghosts further away are frozen or greedy.
+    """
+
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '2', cutoff = '6', farGhosts = 'freeze',
+                 lean = '0', workers = '0'):
+        ReducedGhostSearchAgent.__init__(self, evalFn, depth, cutoff, farGhosts, lean, workers)
+
+    def searchGhosts(self, gameState, near, far, depth, alpha, beta):
+        if gameState.isWin() or gameState.isLose():
+            return self.evaluationFunction(gameState)
+        if not near:
+            return self.maxValue(self.moveFarGhosts(gameState, far), depth + 1, alpha, beta)
+        ghost = near[0]
+        value = float('inf')
+        for action in gameState.getLegalActions(ghost):
+            successor = gameState.generateSuccessor(ghost, action)
+            value = min(value, self.searchGhosts(successor, near[1:], far, depth, alpha, beta))
+            if value < alpha:
+                return value
+            beta = min(beta, value)
+        return value
+
+
+class MacroMoveAgent(MultiAgentSearchAgent):
+    """
+    Search over macro moves: Pacman's move is a whole corridor of the
+    layout's MazeGraph, from where he stands to the next junction, and the
+    ghosts move greedily (moveGhostsGreedily) every round of the walk.  A
+    walk ends early when the game does.  The ghosts do not branch, so the
+    tree has one node per macro move and about three children per node.
+
+    depth is the number of macro moves; the agent plays the first move of
+    the best first corridor.
+    """
+
+    def __init__(self, evalFn = 'scoreEvaluationFunction', depth = '3', lean = '0'):
+        MultiAgentSearchAgent.__init__(self, evalFn, depth, '0', lean)
+        self.nodes = 0
+
+    def getAction(self, gameState: GameState):
+        gameState = self.searchState(gameState)
+        graph = gameState.getMazeGraph()
+        best_score = -float('inf')
+        best_action = None
+        for corridor in graph.corridors(gameState.getPacmanPosition()):
+            eval = self.maxValue(self.walk(gameState, corridor), 1, graph)
+            if eval > best_score or best_action is None:
+                best_score = eval
+                best_action = corridor.actions[0]
+        if best_action is None:
+            return Directions.STOP
+        return best_action
+
+    def walk(self, gameState, corridor):
+        """
+        The state after Pacman walks the corridor, one round per cell.
+        """
+        self.nodes += 1
+        ghosts = range(1, gameState.getNumAgents())
+        for action in corridor.actions:
+            gameState = gameState.generateSuccessor(0, action)
+            gameState = moveGhostsGreedily(gameState, ghosts)
+            if gameState.isWin() or gameState.isLose():
+                break
+        return gameState
+
+    def maxValue(self, gameState, depth, graph):
+        if depth == self.depth or gameState.isWin() or gameState.isLose():
+            return self.evaluationFunction(gameState)
+        corridors = graph.corridors(gameState.getPacmanPosition())
+        if not corridors:
+            return self.evaluationFunction(gameState)
+        return max(self.maxValue(self.walk(gameState, corridor), depth + 1, graph) for corridor in corridors)
+
+
+_ROOT_WORKER = {}
+
+
+def _initRootWorker(agent, sharedAlpha):
+    _ROOT_WORKER['agent'] = agent
+    _ROOT_WORKER['alpha'] = sharedAlpha
+
+
+def _rootWorkerValue(task):
+    """
+    Worker side of MultiAgentSearchAgent.parallelRoot: the value of one root
+    action, searched from the best value found so far by any worker.
+    Returns (value, alpha the search started from).
+    """
+    gameState, action = task
+    shared = _ROOT_WORKER['alpha']
+    alpha = shared.value
+    value = _ROOT_WORKER['agent'].rootValue(gameState, action, alpha)
+    if value > alpha:
+        with shared.get_lock():
+            if value > shared.value:
+                shared.value = value
+    return value, alpha
+
+
+class MCTSNode:
+    """
+    A Pacman decision node of the MCTS tree: a SearchState with Pacman to
+    move, its visit statistics and one GhostNode per tried action.
+    """
+    __slots__ = ('state', 'visits', 'total', 'children', 'untried')
+
+    def __init__(self, state):
+        self.state = state
+        self.visits = 0
+        self.total = 0.0
+        self.children = {}
+        self.untried = state.getLegalActions(0) if not (state.isWin() or state.isLose()) else []
+
+
+class GhostNode:
+    """
+    The chance node after a Pacman action: the state after Pacman moved and
+    the ghost replies sampled so far (tuple of ghost actions -> MCTSNode).
+    """
+    __slots__ = ('state', 'visits', 'total', 'outcomes', 'keys')
+
+    def __init__(self, state):
+        self.state = state
+        self.visits = 0
+        self.total = 0.0
+        self.outcomes = {}
+        self.keys = []  # ena stoixeio gia kathe deigma, gia epilogh analogh ths syxnothtas
+
+
+class MCTSAgent(MultiAgentSearchAgent):
+    """
+    Monte Carlo tree search (UCT) over Pacman's moves.  Ghosts are modelled
+    as moving uniformly at random; a chance node only adds a new sampled
+    ghost reply while it has fewer than widening * visits ** widenExponent
+    of them (progressive widening), otherwise it revisits one of its
+    replies in proportion to how often it was sampled.  Leaves are scored
+    by random rollouts of at most rolloutDepth rounds on a RolloutSimulator.
+
+    The budget per move is rollouts simulations, or moveTime seconds when
+    moveTime > 0.  With stats=1 the rollouts per second are printed at the
+    end of each game.
+    """
+
+    def __init__(self, rollouts = '300', moveTime = '0', rolloutDepth = '10', exploration = '1.0',
+                 widening = '1.0', widenExponent = '0.5', stats = '0'):
+        MultiAgentSearchAgent.__init__(self)
+        self.rollouts = int(rollouts)
+        self.moveTime = float(moveTime)
+        self.rolloutDepth = int(rolloutDepth)
+        self.exploration = float(exploration)
+        self.widening = float(widening)
+        self.widenExponent = float(widenExponent)
+        self.printStats = bool(int(stats))
+        self.totalRollouts = 0
+        self.totalTime = 0.0
+
+    def registerInitialState(self, gameState: GameState):
+        MultiAgentSearchAgent.registerInitialState(self, gameState)
+        self.totalRollouts = 0
+        self.totalTime = 0.0
+
+    def final(self, gameState: GameState):
+        MultiAgentSearchAgent.final(self, gameState)
+        if self.printStats:
+            print('MCTS: %d rollouts in %.2fs (%.0f rollouts/s)' % (
+                self.totalRollouts, self.totalTime, self.totalRollouts / max(self.totalTime, 1e-9)))
+
+    def getAction(self, gameState: GameState):
+        start = time.perf_counter()
+        root = MCTSNode(gameState.getSearchState())
+        self.low, self.high = float('inf'), -float('inf')  # euros timwn gia thn kanonikopoihsh tou UCT
+        done = 0
+        deadline = start + self.moveTime
+        while True:
+            if self.moveTime > 0:
+                if done and time.perf_counter() >= deadline:
+                    break
+            elif done >= max(1, self.rollouts):
+                break
+            self.iterate(root)
+            done += 1
+        self.totalRollouts += done
+        self.totalTime += time.perf_counter() - start
+        # paizoume thn kinisi me tis perissoteres episkepseis
+        return max(root.children.items(), key=lambda item: item[1].visits)[0]
+
+    def iterate(self, root):
+        """
+        One selection / expansion / rollout / backup pass.
+        """
+        path = [root]
+        node = root
+        while True:
+            state = node.state
+            if state.isWin() or state.isLose():
+                value = state.getScore()
+                break
+            if node.untried:
+                action = node.untried.pop(random.randrange(len(node.untried)))
+                chance = GhostNode(state.generateSuccessor(0, action))
+                node.children[action] = chance
+                path.append(chance)
+                child = self.sampleReply(chance)
+                if child is None:
+                    value = chance.state.getScore()
+                else:
+                    path.append(child)
+                    value = self.rollout(child.state)
+                break
+            chance = node.children[self.select(node)]
+            path.append(chance)
+            child = self.sampleReply(chance)
+            if child is None:
+                value = chance.state.getScore()
+                break
+            path.append(child)
+            node = child
+
+        self.low = min(self.low, value)
+        self.high = max(self.high, value)
+        for n in path:
+            n.visits += 1
+            n.total += value
+
+    def select(self, node):
+        """
+        UCB1 over the tried actions, with values scaled to [0, 1] by the
+        lowest and highest returns seen this move.
+        """
+        spread = self.high - self.low
+        low = self.low
+        logN = math.log(node.visits)
+        c = self.exploration
+        best, bestScore = None, -float('inf')
+        for action, chance in node.children.items():
+            mean = chance.total / chance.visits
+            mean = (mean - low) / spread if spread > 0 else 0.5
+            score = mean + c * math.sqrt(logN / chance.visits)
+            if score > bestScore:
+                best, bestScore = action, score
+        return best
+
+    def sampleReply(self, chance):
+        """
+        The ghost reply to follow from a chance node (None if Pacman's move
+        already ended the game): a new random one while the node may still
+        widen, otherwise one of the known replies.
+        """
+        state = chance.state
+        if state.isWin() or state.isLose():
+            return None
+        if chance.outcomes and len(chance.outcomes) >= self.widening * (chance.visits + 1) ** self.widenExponent:
+            return chance.outcomes[random.choice(chance.keys)]
+        replies = []
+        for ghost in range(1, state.getNumAgents()):
+            if state.isWin() or state.isLose():
+                break
+            action = random.choice(state.getLegalActions(ghost))
+            replies.append(action)
+            state = state.generateSuccessor(ghost, action)
+        key = tuple(replies)
+        chance.keys.append(key)
+        child = chance.outcomes.get(key)
+        if child is None:
+            child = chance.outcomes[key] = MCTSNode(state)
+        return child
+
+    def rollout(self, state):
+        """
+        Plays random moves from a SearchState with Pacman to move, for at
+        most rolloutDepth rounds, and returns the final score.  Pacman does
+        not stop and only turns back at dead ends.
+        """
+        sim = RolloutSimulator(state)
+        numAgents = len(sim.pos)
+        choice = random.choice
+        moveTable = sim.moveTable
+        for _ in range(self.rolloutDepth):
+            for agentIndex in range(numAgents):
+                if sim.win or sim.lose:
+                    return sim.score
+                if agentIndex == 0:
+                    # o pacman kineitai san fantasma: xwris STOP, piso mono se adieksodo
+                    legal = moveTable.ghostActions(sim.pos[0], sim.dirs[0]) or sim.legalActions(0)
+                else:
+                    legal = sim.legalActions(agentIndex)
+                sim.step(agentIndex, choice(legal))
+        return sim.score
+
 def betterEvaluationFunction(currentGameState: GameState):
     """
     Your extreme ghost-hunting, pellet-nabbing, food-gobbling, unstoppable
@@ -342,5 +1361,61 @@ def betterEvaluationFunction(currentGameState: GameState):
         score += 20 / (distance + 1)  #prosferei vathmologia me vasi thn apostash apo kathe capsule(antistrofos analoga score kai apostash)
     return score
 
+betterEvaluationFunction.batch = batchEvaluation.betterEvaluations
+
 # Abbreviation
 better = betterEvaluationFunction
+
+def mazeEvaluationFunction(currentGameState: GameState):
+    """
+    betterEvaluationFunction with maze distances (shortest paths around the
+    walls, from the layout's DistanceOracle) instead of Manhattan distances,
+    plus a bonus for the closest pellet.
+    """
+    oracle = currentGameState.getDistanceOracle()
+    distance = oracle.getDistance
+    new_pos = currentGameState.getPacmanPosition()
+    new_food = currentGameState.getFood()
+
+    score = currentGameState.getScore()
+
+    for food in new_food.asList():
+        score += 10 / (distance(new_pos, food) + 1)
+    nearest = oracle.nearestFood(new_pos, new_food)
+    if nearest is not None:
+        score += 10 / (nearest[0] + 1)  #to kontinotero faghto metraei diplo
+
+    for ghost_state in currentGameState.getGhostStates():
+        ghost_distance = distance(new_pos, ghost_state.getPosition())
+        if ghost_state.scaredTimer > 0:
+            score += 200 / (ghost_distance + 1)
+        else:
+            if ghost_distance <= 1:
+                return -float('inf')
+            score -= 20 / (ghost_distance + 1)
+    for capsule in currentGameState.getCapsules():
+        score += 20 / (distance(new_pos, capsule) + 1)
+    return score
+
+maze = mazeEvaluationFunction
+
+def incrementalEvaluationFunction(currentGameState: GameState):
+    """
+    betterEvaluationFunction (up to float rounding) on the state's
+    StateFeatures, which are carried forward from the predecessor instead of
+    looping over every pellet.
+    """
+    features = currentGameState.getFeatures()
+    score = currentGameState.getScore() + 10 * features.foodSum + 20 * features.capsuleSum
+    for ghost_state, distance in zip(currentGameState.getGhostStates(), features.ghostDistances):
+        if ghost_state.scaredTimer > 0:
+            score += 200 / (distance + 1)
+        else:
+            if distance <= 1:
+                return -float('inf')
+            score -= 20 / (distance + 1)
+    return score
+
+incrementalEvaluationFunction.usesFeatures = True  # o agent zhtaei GameState.setFeatureTracking (usesFeatureTracking)
+
+incremental = incrementalEvaluationFunction
@@ -27,9 +27,10 @@ from collections import defaultdict
 from pprint import PrettyPrinter
 pp = PrettyPrinter()
 
-from game import Agent
+from game import Agent, BitGrid
 from pacman import GameState
 from ghostAgents import RandomGhost, DirectionalGhost
+from pacmanAgents import GreedyAgent
 import random
 import math
 import traceback
@@ -37,6 +38,8 @@ import sys
 import os
 import layout
 import pacman
+import gameRecords
+import mazeDistances
 import autograder
 # import grading
 
@@ -178,6 +181,8 @@ class GradingAgent(Agent):
         # keep track of elapsed moves
         self.stepCount = 0
         self.seed = seed
+        # grading counts the states the student agent expands
+        GameState.setExploredTracking(True)
 
     def registerInitialState(self, state):
         if 'registerInitialState' in dir(self.studentAgent):
@@ -241,6 +246,8 @@ class GradingAgent(Agent):
 
 class PolyAgent(Agent):
     def __init__(self, seed, multiAgents, ourPacOptions, depth):
+        # the reference agents' expanded-state counts are recorded too
+        GameState.setExploredTracking(True)
         # prepare our pacman agents
         solutionAgents, alternativeDepthAgents, partialPlyBugAgents = self.construct_our_pacs(
             multiAgents, ourPacOptions)
@@ -576,3 +583,268 @@ class EvalAgentTest(testClasses.TestCase):
         handle.write('# File intentionally blank.\n')
         handle.close()
         return True
+
+
+def randomGameStates(lay, seed, numMoves, numGhosts):
+    """
+    Yields the GameStates of a seeded random game on lay: the start state,
+    then the state after every move (all agents in turn), for numMoves
+    moves or until the game ends.  A state is yielded before its successor
+    is generated, so whatever the caller caches on it is inherited.
+    """
+    rng = random.Random(seed)
+    state = GameState()
+    state.initialize(lay, numGhosts)
+    yield state
+    agentIndex = 0
+    for _ in range(numMoves):
+        if state.isWin() or state.isLose():
+            return
+        state = state.generateSuccessor(agentIndex, rng.choice(state.getLegalActions(agentIndex)))
+        yield state
+        agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+
+class RandomGameTest(testClasses.TestCase):
+    """
+    Plays a seeded random game on a layout and calls checkState on every
+    state; checkState returns None, or a description of what is wrong.
+    Used for the search infrastructure, whose fast paths must agree with
+    the plain game rules.
+    """
+
+    def __init__(self, question, testDict):
+        super(RandomGameTest, self).__init__(question, testDict)
+        self.layoutName = testDict['layoutName']
+        self.seed = int(testDict['randomSeed'])
+        self.numMoves = int(testDict['numMoves'])
+        self.numGhosts = int(testDict.get('numGhosts', '2'))
+
+    def checkState(self, moduleDict, move, state):
+        self.raiseNotDefined()
+
+    def execute(self, grades, moduleDict, solutionDict):
+        lay = layout.getLayout(self.layoutName)
+        checked = 0
+        for move, state in enumerate(randomGameStates(lay, self.seed, self.numMoves, self.numGhosts)):
+            error = self.checkState(moduleDict, move, state)
+            if error is not None:
+                self.addMessage('%s, move %d: %s' % (self.layoutName, move, error))
+                return self.testFail(grades)
+            checked += 1
+        self.addMessage('%d states checked on %s' % (checked, self.layoutName))
+        return self.testPass(grades)
+
+    def writeSolution(self, moduleDict, filePath):
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        handle.write('# File intentionally blank.\n')
+        handle.close()
+        return True
+
+
+class ZobristKeyTest(RandomGameTest):
+    """
+    The incrementally updated Zobrist key equals a full recompute.
+    """
+
+    def checkState(self, moduleDict, move, state):
+        data = state.data
+        key = data.getZobristKey()
+        expected = data.computeZobrist() ^ data.zobristTable.scoreKey(data.score)
+        if key != expected:
+            return 'incremental Zobrist key %016x, recomputed %016x' % (key, expected)
+        return None
+
+
+def gameStateSummary(state):
+    agents = [(a.getPosition(), a.getDirection(), a.scaredTimer) for a in state.data.agentStates]
+    return (state.getScore(), state.isWin(), state.isLose(), agents,
+            BitGrid.fromGrid(state.data.food).bits, sorted(state.getCapsules()))
+
+
+def searchStateSummary(state):
+    agents = [(a.pos, a.direction, a.scaredTimer) for a in state.agents]
+    return (state.getScore(), state.isWin(), state.isLose(), agents,
+            state.food, sorted(state.getCapsules()))
+
+
+class SearchStateTest(RandomGameTest):
+    """
+    SearchState has the same legal actions as GameState for every agent,
+    and every successor has the same score, outcome, agents, food and
+    capsules.
+    """
+
+    def checkState(self, moduleDict, move, state):
+        searchState = state.getSearchState()
+        if searchStateSummary(searchState) != gameStateSummary(state):
+            return 'SearchState.fromGameState differs from the GameState'
+        for agentIndex in range(state.getNumAgents()):
+            actions = state.getLegalActions(agentIndex)
+            searchActions = searchState.getLegalActions(agentIndex)
+            if searchActions != actions:
+                return 'agent %d: legal actions %s, SearchState has %s' % (agentIndex, actions, searchActions)
+            for action in actions:
+                expected = gameStateSummary(state.generateSuccessor(agentIndex, action))
+                successor = searchStateSummary(searchState.generateSuccessor(agentIndex, action))
+                if successor != expected:
+                    return 'agent %d, %s: successor %s, GameState gives %s' % (
+                        agentIndex, action, successor, expected)
+        return None
+
+
+class StarExpectimaxTest(RandomGameTest):
+    """
+    ExpectimaxAgent with Star1 and Star2 pruning gives every root action
+    the same value as plain expectimax, and picks the same action, when the
+    evaluations lie inside the declared bounds.  Checked on the Pacman
+    turns of every `every`-th round.
+    """
+
+    def __init__(self, question, testDict):
+        super(StarExpectimaxTest, self).__init__(question, testDict)
+        self.depth = testDict['depth']
+        self.every = int(testDict['every'])
+        self.starArgs = pacman.parseAgentArgs(testDict['starArgs'])
+
+    def checkState(self, moduleDict, move, state):
+        numAgents = state.getNumAgents()
+        if move % (numAgents * self.every) != 0 or state.isWin() or state.isLose():
+            return None
+        ExpectimaxAgent = moduleDict['multiAgents'].ExpectimaxAgent
+        plain = ExpectimaxAgent(depth=self.depth)
+        values = dict((action, plain.rootValue(state, action)) for action in state.getLegalActions(0))
+        for star in ('1', '2'):
+            agent = ExpectimaxAgent(depth=self.depth, star=star, **self.starArgs)
+            for action, value in values.items():
+                starValue = agent.rootValue(state, action)
+                if abs(starValue - value) > 1e-6:
+                    return 'star=%s, %s: value %s, expectimax gives %s' % (star, action, starValue, value)
+            action, expected = agent.getAction(state), plain.getAction(state)
+            if action != expected:
+                return 'star=%s picks %s, expectimax picks %s' % (star, action, expected)
+        return None
+
+
+class GameRecordTest(testClasses.TestCase):
+    """
+    Plays a few games, packs their PGR1 records into one buffer and reads
+    them back: every record must unpack to the same fields and moves, and
+    replay (gameRecords.verify) to its recorded score and outcome.  A record
+    with a wrong score must not verify.
+    """
+
+    def __init__(self, question, testDict):
+        super(GameRecordTest, self).__init__(question, testDict)
+        self.layoutName = testDict['layoutName']
+        self.seed = int(testDict['randomSeed'])
+        self.numGames = int(testDict['numGames'])
+        self.numGhosts = int(testDict.get('numGhosts', '2'))
+
+    def execute(self, grades, moduleDict, solutionDict):
+        GameRecord = gameRecords.GameRecord
+        lay = layout.getLayout(self.layoutName)
+        random.seed(self.seed)
+        ghosts = [RandomGhost(i + 1) for i in range(self.numGhosts)]
+        games = pacman.runGames(lay, GreedyAgent(), ghosts, self.question.getDisplay(),
+                                self.numGames, False, catchExceptions=False)
+        records = [GameRecord.fromGame(game, lay, str(self.seed)) for game in games]
+        buffer = b''.join(record.pack() for record in records)
+
+        offset = 0
+        for i, (game, record) in enumerate(zip(games, records)):
+            copy, offset = GameRecord.unpack(buffer, offset)
+            if vars(copy) != vars(record):
+                self.addMessage('game %d: unpacked %s, packed %s' % (i, vars(copy), vars(record)))
+                return self.testFail(grades)
+            if copy.actions() != list(game.moveHistory):
+                self.addMessage('game %d: the record does not hold the moves of the game' % i)
+                return self.testFail(grades)
+            error = gameRecords.verify(copy, lay)
+            if error is not None:
+                self.addMessage('game %d: %s' % (i, error))
+                return self.testFail(grades)
+        if offset != len(buffer):
+            self.addMessage('%d bytes left after the last record' % (len(buffer) - offset))
+            return self.testFail(grades)
+
+        record = records[0]
+        wrong = GameRecord(record.layoutName, record.layoutHash, record.seed, record.numGhosts,
+                           record.score + 1, record.outcome, record.moves)
+        if gameRecords.verify(wrong, lay) is None:
+            self.addMessage('a record with a wrong score verifies')
+            return self.testFail(grades)
+
+        self.addMessage('%d games (%d moves) packed, unpacked and replayed' % (
+            len(records), sum(len(record.moves) for record in records)))
+        return self.testPass(grades)
+
+    def writeSolution(self, moduleDict, filePath):
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        handle.write('# File intentionally blank.\n')
+        handle.close()
+        return True
+
+
+def bfsDistances(walls, source):
+    """
+    Maze distances from source to every reachable cell, by plain BFS.
+    """
+    distances = {source: 0}
+    frontier = [source]
+    while frontier:
+        nextFrontier = []
+        for x, y in frontier:
+            for cell in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if not walls[cell[0]][cell[1]] and cell not in distances:
+                    distances[cell] = distances[(x, y)] + 1
+                    nextFrontier.append(cell)
+        frontier = nextFrontier
+    return distances
+
+
+class DistanceOracleTest(testClasses.TestCase):
+    """
+    The DistanceOracle of each layout (as agents get it, from the cache)
+    gives the BFS distance between every pair of open cells, and
+    nearestFood the distance to the closest pellet of the layout.
+    """
+
+    def __init__(self, question, testDict):
+        super(DistanceOracleTest, self).__init__(question, testDict)
+        self.layoutNames = testDict['layoutNames'].split()
+
+    def execute(self, grades, moduleDict, solutionDict):
+        pairs = 0
+        for layoutName in self.layoutNames:
+            lay = layout.getLayout(layoutName)
+            oracle = mazeDistances.getDistanceOracle(lay)
+            food = lay.food.asList()
+            for source in lay.openCells:
+                expected = bfsDistances(lay.walls, source)
+                for target in lay.openCells:
+                    distance = oracle.getDistance(source, target)
+                    if distance != expected.get(target, float('inf')):
+                        self.addMessage('%s: distance %s -> %s is %s, BFS gives %s' % (
+                            layoutName, source, target, distance, expected.get(target)))
+                        return self.testFail(grades)
+                    pairs += 1
+                reachable = [expected[cell] for cell in food if cell in expected]
+                nearest = oracle.nearestFood(source, lay.food)
+                nearestDistance = nearest[0] if nearest is not None else None
+                expectedNearest = min(reachable) if reachable else None
+                if nearestDistance != expectedNearest:
+                    self.addMessage('%s: nearest food from %s is %s, BFS gives distance %s' % (
+                        layoutName, source, nearest, expectedNearest))
+                    return self.testFail(grades)
+        self.addMessage('%d distances checked on %s' % (pairs, ' '.join(self.layoutNames)))
+        return self.testPass(grades)
+
+    def writeSolution(self, moduleDict, filePath):
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        handle.write('# File intentionally blank.\n')
+        handle.close()
+        return True
@@ -40,9 +40,13 @@ To play your first game, type 'python pacman.py' from the command line.
 The keys are 'a', 's', 'd', and 'w' to move (or arrow keys).  Have fun!
 """
 from game import GameStateData
+from game import BitGrid
 from game import Game
 from game import Directions
 from game import Actions
+from mazeDistances import getDistanceOracle
+from mazeGraph import getMazeGraph
+from stateFeatures import StateFeatures, getDataFeatures
 from util import nearestPoint
 from util import manhattanDistance
 import util
@@ -80,12 +84,60 @@ class GameState:
     # static variable keeps track of which states have had getLegalActions called
     explored = set()
 
-    def getAndResetExplored():
-        tmp = GameState.explored.copy()
+    # Explored-state tracking is instrumentation (the autograder counts
+    # expanded states with it) and is off by default: it costs a hash per
+    # successor and keeps every state alive.  See setExploredTracking.
+    trackExplored = False
+    exploredLimit = None    # keep at most this many states
+    exploredSample = 1      # keep only states whose hash is divisible by this
+    exploredDropped = 0     # states not kept because of the limit
+
+    # With feature tracking on, every successor remembers its predecessor
+    # until its features are computed, so getFeatures() can derive them
+    # incrementally.  See stateFeatures.py.
+    trackFeatures = False
+
+    def setExploredTracking(enabled=True, limit=None, sample=1):
+        """
+        Turns explored-state tracking on or off.  With a limit, no more states
+        are recorded once the set holds that many (exploredDropped counts the
+        rest).  With sample=k only states whose hash is a multiple of k are
+        kept, so len(explored) * k estimates the number of distinct states.
+        """
+        GameState.trackExplored = enabled
+        GameState.exploredLimit = limit
+        GameState.exploredSample = max(1, int(sample))
+        GameState.resetExplored()
+    setExploredTracking = staticmethod(setExploredTracking)
+
+    def resetExplored():
         GameState.explored = set()
+        GameState.exploredDropped = 0
+    resetExplored = staticmethod(resetExplored)
+
+    def getAndResetExplored():
+        tmp = GameState.explored
+        GameState.resetExplored()
         return tmp
     getAndResetExplored = staticmethod(getAndResetExplored)
 
+    def recordExplored(*states):
+        explored = GameState.explored
+        sample = GameState.exploredSample
+        limit = GameState.exploredLimit
+        for state in states:
+            if sample > 1 and hash(state) % sample:
+                continue
+            if limit is not None and len(explored) >= limit and state not in explored:
+                GameState.exploredDropped += 1
+                continue
+            explored.add(state)
+    recordExplored = staticmethod(recordExplored)
+
+    def setFeatureTracking(enabled=True):
+        GameState.trackFeatures = enabled
+    setFeatureTracking = staticmethod(setFeatureTracking)
+
     def getLegalActions(self, agentIndex=0):
         """
         Returns the legal actions for the agent specified.
@@ -121,7 +173,9 @@ class GameState:
         if agentIndex == 0:
             state.data.scoreChange += -TIME_PENALTY  # Penalty for waiting around
         else:
+            oldKey = state.data.agentKey(agentIndex)
             GhostRules.decrementTimer(state.data.agentStates[agentIndex])
+            state.data.rehashAgent(agentIndex, oldKey)
 
         # Resolve multi-agent effects
         GhostRules.checkDeath(state, agentIndex)
@@ -129,8 +183,10 @@ class GameState:
         # Book keeping
         state.data._agentMoved = agentIndex
         state.data.score += state.data.scoreChange
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        if GameState.trackFeatures:
+            state.data._featureParent = self.data
+        if GameState.trackExplored:
+            GameState.recordExplored(self, state)
         return state
 
     def getLegalPacmanActions(self):
@@ -252,6 +308,13 @@ class GameState:
         """
         return hash(self.data)
 
+    def getZobristKey(self):
+        """
+        Returns a 64-bit Zobrist key for this state.  It is kept up to date
+        incrementally as agents move, so reading it is O(1).
+        """
+        return self.data.getZobristKey()
+
     def __str__(self):
 
         return str(self.data)
@@ -262,6 +325,322 @@ class GameState:
         """
         self.data.initialize(layout, numGhostAgents)
 
+    def getDistanceOracle(self):
+        """
+        Returns the DistanceOracle of this layout (see mazeDistances.py):
+        oracle.getDistance(pos1, pos2) is the maze distance, and
+        oracle.nearestFood(pos, state.getFood()) the closest pellet.
+        """
+        return getDistanceOracle(self.data.layout)
+
+    def getMazeGraph(self):
+        """
+        Returns the MazeGraph of this layout (see mazeGraph.py): the
+        junctions and the corridors between them.
+        """
+        return getMazeGraph(self.data.layout)
+
+    def getSearchState(self):
+        """
+        Returns an immutable SearchState with the same position, for search
+        agents that only need successors and evaluation.
+        """
+        return SearchState.fromGameState(self)
+
+    def getFeatures(self):
+        """
+        Returns the StateFeatures of this state (food and capsule distance
+        sums, nearest food, ghost distances; see stateFeatures.py).  With
+        feature tracking on they are derived from the predecessor's.
+        """
+        return getDataFeatures(self)
+
+
+class SearchAgentState:
+    """
+    Immutable (by convention) agent state of a SearchState: position,
+    direction and scared timer, plus the start configuration ghosts are
+    sent back to when eaten.  It has the AgentState accessors evaluation
+    functions use.
+    """
+    __slots__ = ('pos', 'direction', 'scaredTimer', 'start', 'isPacman')
+
+    def __init__(self, pos, direction, scaredTimer, start, isPacman):
+        self.pos = pos
+        self.direction = direction
+        self.scaredTimer = scaredTimer
+        self.start = start
+        self.isPacman = isPacman
+
+    def getPosition(self):
+        return self.pos
+
+    def getDirection(self):
+        return self.direction
+
+    def key(self):
+        return (self.pos, self.direction, self.scaredTimer)
+
+
+class SearchState:
+    """
+    A lean game state for adversarial search.  generateSuccessor follows the
+    same rules as GameState (same scores, win/lose flags and legal moves) but:
+      - the state is immutable, so a successor shares the layout, the food
+        int and every agent it does not change with its parent,
+      - food is a BitGrid bitmask int and the pellet count is carried along,
+      - the action is not re-checked for legality,
+      - nothing is added to GameState.explored.
+    Use GameState.getSearchState() to get one for the current position.
+    """
+    __slots__ = ('layout', 'agents', 'food', 'numFood', 'capsules', 'score', 'win', 'lose')
+
+    @staticmethod
+    def fromGameState(gameState):
+        data = gameState.data
+        food = data.food
+        if not isinstance(food, BitGrid):
+            food = BitGrid.fromGrid(food)
+        state = SearchState()
+        state.layout = data.layout
+        state.agents = tuple(SearchAgentState(a.configuration.pos, a.configuration.direction, a.scaredTimer,
+                                              a.start, a.isPacman)
+                             for a in data.agentStates)
+        state.food = food.bits
+        state.numFood = food.count()
+        state.capsules = tuple(data.capsules)
+        state.score = data.score
+        state.win = data._win
+        state.lose = data._lose
+        return state
+
+    def getLegalActions(self, agentIndex=0):
+        if self.win or self.lose:
+            return []
+        agent = self.agents[agentIndex]
+        if agentIndex == 0:
+            return list(self.layout.moveTable.pacmanActions(agent.pos, agent.direction))
+        return list(self.layout.moveTable.ghostActions(agent.pos, agent.direction))
+
+    def generateSuccessor(self, agentIndex, action):
+        if self.win or self.lose:
+            raise Exception('Can\'t generate a successor of a terminal state.')
+
+        state = SearchState()
+        state.layout = self.layout
+        state.food = self.food
+        state.numFood = self.numFood
+        state.capsules = self.capsules
+        state.win = False
+        state.lose = False
+        agents = list(self.agents)
+        agent = agents[agentIndex]
+        dx, dy = Actions._directions[action]
+        direction = agent.direction if action == Directions.STOP else action
+        x, y = agent.pos
+
+        if agentIndex == 0:
+            pos = (x + dx, y + dy)
+            agents[0] = SearchAgentState(pos, direction, agent.scaredTimer, agent.start, True)
+            scoreChange = -TIME_PENALTY
+            nearest = nearestPoint(pos)
+            if manhattanDistance(nearest, pos) <= 0.5:
+                fx, fy = nearest
+                bit = 1 << (fx * self.layout.height + fy)
+                if state.food & bit:
+                    scoreChange += 10
+                    state.food ^= bit
+                    state.numFood -= 1
+                    if state.numFood == 0:
+                        scoreChange += 500
+                        state.win = True
+                if nearest in state.capsules:
+                    state.capsules = tuple(c for c in state.capsules if c != nearest)
+                    for index in range(1, len(agents)):
+                        ghost = agents[index]
+                        agents[index] = SearchAgentState(ghost.pos, ghost.direction, SCARED_TIME,
+                                                         ghost.start, False)
+            colliding = range(1, len(agents))
+        else:
+            speed = GhostRules.GHOST_SPEED
+            timer = agent.scaredTimer
+            if timer > 0:
+                speed /= 2.0
+            pos = (x + dx * speed, y + dy * speed)
+            if timer == 1:
+                pos = nearestPoint(pos)
+            agents[agentIndex] = SearchAgentState(pos, direction, max(0, timer - 1), agent.start, False)
+            scoreChange = 0
+            colliding = (agentIndex,)
+
+        # Pacman-ghost collisions, as in GhostRules.checkDeath
+        pacmanPosition = agents[0].pos
+        for index in colliding:
+            ghost = agents[index]
+            if manhattanDistance(ghost.pos, pacmanPosition) <= COLLISION_TOLERANCE:
+                if ghost.scaredTimer > 0:
+                    scoreChange += 200
+                    agents[index] = SearchAgentState(ghost.start.pos, ghost.start.direction, 0,
+                                                     ghost.start, False)
+                elif not state.win:
+                    scoreChange -= 500
+                    state.lose = True
+
+        state.agents = tuple(agents)
+        state.score = self.score + scoreChange
+        return state
+
+    def generatePacmanSuccessor(self, action):
+        return self.generateSuccessor(0, action)
+
+    def getLegalPacmanActions(self):
+        return self.getLegalActions(0)
+
+    def getPacmanState(self):
+        return self.agents[0]
+
+    def getPacmanPosition(self):
+        return self.agents[0].pos
+
+    def getGhostStates(self):
+        return self.agents[1:]
+
+    def getGhostState(self, agentIndex):
+        return self.agents[agentIndex]
+
+    def getGhostPosition(self, agentIndex):
+        return self.agents[agentIndex].pos
+
+    def getGhostPositions(self):
+        return [a.pos for a in self.agents[1:]]
+
+    def getNumAgents(self):
+        return len(self.agents)
+
+    def getScore(self):
+        return float(self.score)
+
+    def getCapsules(self):
+        return list(self.capsules)
+
+    def getNumFood(self):
+        return self.numFood
+
+    def getFood(self):
+        return BitGrid(self.layout.width, self.layout.height, bits=self.food)
+
+    def getWalls(self):
+        return self.layout.walls
+
+    def getDistanceOracle(self):
+        return getDistanceOracle(self.layout)
+
+    def getMazeGraph(self):
+        return getMazeGraph(self.layout)
+
+    def getFeatures(self):
+        return StateFeatures.fromState(self)
+
+    def hasFood(self, x, y):
+        return (self.food >> (x * self.layout.height + y)) & 1 == 1
+
+    def hasWall(self, x, y):
+        return self.layout.walls[x][y]
+
+    def isWin(self):
+        return self.win
+
+    def isLose(self):
+        return self.lose
+
+    def __eq__(self, other):
+        return isinstance(other, SearchState) and self.food == other.food and \
+            self.capsules == other.capsules and self.score == other.score and \
+            [a.key() for a in self.agents] == [a.key() for a in other.agents]
+
+    def __hash__(self):
+        return hash((tuple(a.key() for a in self.agents), self.food, self.capsules, self.score))
+
+
+class RolloutSimulator:
+    """
+    A mutable copy of a SearchState for Monte Carlo rollouts.  step() applies
+    the same rules as SearchState.generateSuccessor in place, on plain lists
+    and the food bitmask, so a rollout allocates nothing per move.
+
+    legalActions returns the shared tuples of the layout's MoveTable (do not
+    modify them).
+    """
+    __slots__ = ('walls', 'height', 'moveTable', 'pos', 'dirs', 'timers', 'starts', 'food', 'numFood',
+                 'capsules', 'score', 'win', 'lose')
+
+    def __init__(self, state):
+        self.walls = state.layout.walls
+        self.height = state.layout.height
+        self.moveTable = state.layout.moveTable
+        self.pos = [a.pos for a in state.agents]
+        self.dirs = [a.direction for a in state.agents]
+        self.timers = [a.scaredTimer for a in state.agents]
+        self.starts = [(a.start.pos, a.start.direction) for a in state.agents]
+        self.food = state.food
+        self.numFood = state.numFood
+        self.capsules = list(state.capsules)
+        self.score = state.score
+        self.win = state.win
+        self.lose = state.lose
+
+    def legalActions(self, agentIndex):
+        if agentIndex == 0:
+            return self.moveTable.pacmanActions(self.pos[0], self.dirs[0])
+        return self.moveTable.ghostActions(self.pos[agentIndex], self.dirs[agentIndex])
+
+    def step(self, agentIndex, action):
+        dx, dy = Actions._directions[action]
+        if action != Directions.STOP:
+            self.dirs[agentIndex] = action
+        x, y = self.pos[agentIndex]
+        pos = self.pos
+        timers = self.timers
+
+        if agentIndex == 0:
+            pos[0] = (x + dx, y + dy)
+            self.score -= TIME_PENALTY
+            nearest = nearestPoint(pos[0])
+            if manhattanDistance(nearest, pos[0]) <= 0.5:
+                bit = 1 << (nearest[0] * self.height + nearest[1])
+                if self.food & bit:
+                    self.score += 10
+                    self.food ^= bit
+                    self.numFood -= 1
+                    if self.numFood == 0:
+                        self.score += 500
+                        self.win = True
+                if nearest in self.capsules:
+                    self.capsules.remove(nearest)
+                    for index in range(1, len(pos)):
+                        timers[index] = SCARED_TIME
+            colliding = range(1, len(pos))
+        else:
+            timer = timers[agentIndex]
+            if timer > 0:
+                dx, dy = dx * 0.5, dy * 0.5
+            pos[agentIndex] = (x + dx, y + dy)
+            if timer == 1:
+                pos[agentIndex] = nearestPoint(pos[agentIndex])
+            timers[agentIndex] = max(0, timer - 1)
+            colliding = (agentIndex,)
+
+        pacmanPosition = pos[0]
+        for index in colliding:
+            if manhattanDistance(pos[index], pacmanPosition) <= COLLISION_TOLERANCE:
+                if timers[index] > 0:
+                    self.score += 200
+                    pos[index], self.dirs[index] = self.starts[index]
+                    timers[index] = 0
+                elif not self.win:
+                    self.score -= 500
+                    self.lose = True
+
 ############################################################################
 #                     THE HIDDEN SECRETS OF PACMAN                         #
 #                                                                          #
@@ -283,13 +662,15 @@ class ClassicGameRules:
     def __init__(self, timeout=30):
         self.timeout = timeout
 
-    def newGame(self, layout, pacmanAgent, ghostAgents, display, quiet=False, catchExceptions=False):
+    def newGame(self, layout, pacmanAgent, ghostAgents, display, quiet=False, catchExceptions=False,
+                fastLoop=False):
         agents = [pacmanAgent] + ghostAgents[:layout.getNumGhosts()]
         initState = GameState()
         initState.initialize(layout, len(ghostAgents))
-        game = Game(agents, display, self, catchExceptions=catchExceptions)
+        game = Game(agents, display, self, catchExceptions=catchExceptions, fastLoop=fastLoop)
         game.state = initState
         self.initialState = initState.deepCopy()
+        GameState.resetExplored()  # explored states are counted per game
         self.quiet = quiet
         return game
 
@@ -348,7 +729,8 @@ class PacmanRules:
         """
         Returns a list of possible actions.
         """
-        return Actions.getPossibleActions(state.getPacmanState().configuration, state.data.layout.walls)
+        conf = state.getPacmanState().configuration
+        return list(state.data.layout.moveTable.pacmanActions(conf.pos, conf.direction))
     getLegalActions = staticmethod(getLegalActions)
 
     def applyAction(state, action):
@@ -360,11 +742,13 @@ class PacmanRules:
             raise Exception("Illegal action " + str(action))
 
         pacmanState = state.data.agentStates[0]
+        oldKey = state.data.agentKey(0)
 
         # Update Configuration
         vector = Actions.directionToVector(action, PacmanRules.PACMAN_SPEED)
         pacmanState.configuration = pacmanState.configuration.generateSuccessor(
             vector)
+        state.data.rehashAgent(0, oldKey)
 
         # Eat
         next = pacmanState.configuration.getPosition()
@@ -381,6 +765,7 @@ class PacmanRules:
             state.data.scoreChange += 10
             state.data.food = state.data.food.copy()
             state.data.food[x][y] = False
+            state.data.rehashFood(position)
             state.data._foodEaten = position
             # TODO: cache numFood?
             numFood = state.getNumFood()
@@ -390,10 +775,13 @@ class PacmanRules:
         # Eat capsule
         if(position in state.getCapsules()):
             state.data.capsules.remove(position)
+            state.data.rehashCapsule(position)
             state.data._capsuleEaten = position
             # Reset all ghosts' scared timers
             for index in range(1, len(state.data.agentStates)):
+                oldKey = state.data.agentKey(index)
                 state.data.agentStates[index].scaredTimer = SCARED_TIME
+                state.data.rehashAgent(index, oldKey)
     consume = staticmethod(consume)
 
 
@@ -409,14 +797,7 @@ class GhostRules:
         reach a dead end, but can turn 90 degrees at intersections.
         """
         conf = state.getGhostState(ghostIndex).configuration
-        possibleActions = Actions.getPossibleActions(
-            conf, state.data.layout.walls)
-        reverse = Actions.reverseDirection(conf.direction)
-        if Directions.STOP in possibleActions:
-            possibleActions.remove(Directions.STOP)
-        if reverse in possibleActions and len(possibleActions) > 1:
-            possibleActions.remove(reverse)
-        return possibleActions
+        return list(state.data.layout.moveTable.ghostActions(conf.pos, conf.direction))
     getLegalActions = staticmethod(getLegalActions)
 
     def applyAction(state, action, ghostIndex):
@@ -426,12 +807,14 @@ class GhostRules:
             raise Exception("Illegal ghost action " + str(action))
 
         ghostState = state.data.agentStates[ghostIndex]
+        oldKey = state.data.agentKey(ghostIndex)
         speed = GhostRules.GHOST_SPEED
         if ghostState.scaredTimer > 0:
             speed /= 2.0
         vector = Actions.directionToVector(action, speed)
         ghostState.configuration = ghostState.configuration.generateSuccessor(
             vector)
+        state.data.rehashAgent(ghostIndex, oldKey)
     applyAction = staticmethod(applyAction)
 
     def decrementTimer(ghostState):
@@ -459,9 +842,11 @@ class GhostRules:
 
     def collide(state, ghostState, agentIndex):
         if ghostState.scaredTimer > 0:
+            oldKey = state.data.agentKey(agentIndex)
             state.data.scoreChange += 200
             GhostRules.placeGhost(state, ghostState)
             ghostState.scaredTimer = 0
+            state.data.rehashAgent(agentIndex, oldKey)
             # Added for first-person
             state.data._eaten[agentIndex] = True
         else:
@@ -541,9 +926,10 @@ def readCommand(argv):
     parser.add_option('-f', '--fixRandomSeed', action='store_true', dest='fixRandomSeed',
                       help='Fixes the random seed to always play the same game', default=False)
     parser.add_option('-r', '--recordActions', action='store_true', dest='record',
-                      help='Writes game histories to a file (named by the time they were played)', default=False)
+                      help='Appends the games to a record file (named by the time they were played)', default=False)
     parser.add_option('--replay', dest='gameToReplay',
-                      help='A recorded game file (pickle) to replay', default=None)
+                      help='A record file to replay (with -q: verify every game in it without display)',
+                      default=None)
     parser.add_option('-a', '--agentArgs', dest='agentArgs',
                       help='Comma separated values sent to agent. e.g. "opt1=val1,opt2,opt3=val3"')
     parser.add_option('-x', '--numTraining', dest='numTraining', type='int',
@@ -554,6 +940,18 @@ def readCommand(argv):
                       help='Turns on exception handling and timeouts during games', default=False)
     parser.add_option('--timeout', dest='timeout', type='int',
                       help=default('Maximum length of time an agent can spend computing in a single game'), default=30)
+    parser.add_option('--fastLoop', action='store_true', dest='fastLoop',
+                      help='Use the low-overhead game loop (same outcomes; time limits checked after each move)',
+                      default=False)
+    parser.add_option('--workers', dest='workers', type='int',
+                      help=default('Play the games in this many processes, without graphics (0 = in this process)'),
+                      default=0)
+    parser.add_option('--trackExplored', action='store_true', dest='trackExplored',
+                      help='Count the distinct states expanded in each game', default=False)
+    parser.add_option('--exploredLimit', dest='exploredLimit', type='int',
+                      help='With --trackExplored, keep at most this many states per game', default=None)
+    parser.add_option('--exploredSample', dest='exploredSample', type='int',
+                      help=default('With --trackExplored, keep 1 in SAMPLE states (by hash)'), metavar='SAMPLE', default=1)
 
     options, otherjunk = parser.parse_args(argv)
     if len(otherjunk) != 0:
@@ -606,12 +1004,29 @@ def readCommand(argv):
     args['record'] = options.record
     args['catchExceptions'] = options.catchExceptions
     args['timeout'] = options.timeout
+    args['workers'] = options.workers
+    args['fastLoop'] = options.fastLoop
+    if options.workers > 0:
+        import textDisplay
+        args['display'] = textDisplay.NullGraphics()
+    if options.trackExplored:
+        GameState.setExploredTracking(True, options.exploredLimit, options.exploredSample)
 
     # Special case: recorded games don't use the runGames method or args structure
     if options.gameToReplay != None:
+        import gameRecords
+        if gameRecords.isRecordFile(options.gameToReplay):
+            if options.quietGraphics:
+                sys.exit(1 if gameRecords.verifyFiles([options.gameToReplay]) else 0)
+            layouts = gameRecords.LayoutCache()
+            for i, record in enumerate(gameRecords.readRecords(options.gameToReplay)):
+                print('Replaying game %d of %s.' % (i + 1, options.gameToReplay))
+                replayGame(layouts.get(record), record.actions(), args['display'], record.numGhosts)
+            sys.exit(0)
+        # old format: a pickle with the whole Layout
         print('Replaying recorded game %s.' % options.gameToReplay)
         import pickle
-        f = open(options.gameToReplay)
+        f = open(options.gameToReplay, 'rb')
         try:
             recorded = pickle.load(f)
         finally:
@@ -651,12 +1066,14 @@ def loadAgent(pacman, nographics):
                     ' is not specified in any *Agents.py.')
 
 
-def replayGame(layout, actions, display):
+def replayGame(layout, actions, display, numGhosts=None):
     import pacmanAgents
     import ghostAgents
     rules = ClassicGameRules()
+    if numGhosts is None:
+        numGhosts = layout.getNumGhosts()
     agents = [pacmanAgents.GreedyAgent()] + [ghostAgents.RandomGhost(i+1)
-                                             for i in range(layout.getNumGhosts())]
+                                             for i in range(numGhosts)]
     game = rules.newGame(layout, agents[0], agents[1:], display)
     state = game.state
     display.initialize(state.data)
@@ -672,15 +1089,30 @@ def replayGame(layout, actions, display):
     display.finish()
 
 
-def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, catchExceptions=False, timeout=30):
+def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, catchExceptions=False, timeout=30,
+             workers=0, fastLoop=False):
+    """
+    Plays numGames games (the first numTraining quietly) and prints a summary.
+
+    Every game is seeded with gameSeed(seed, i), seed drawn once from the
+    random module, and the games after the training ones are played by
+    fresh copies of the agents (copyAgents).  With workers > 0 those games
+    are played by that many processes (see runParallelGames); the results
+    are the same for any number of workers, including none.
+
+    fastLoop plays with Game.runFast (same outcomes, less per-turn overhead).
+    """
     import __main__
     __main__.__dict__['_display'] = display
 
     rules = ClassicGameRules(timeout)
     games = []
+    recordFile = recordFileName() if record else None
+    seed = random.getrandbits(64)
 
-    for i in range(numGames):
+    for i in range(numGames if workers <= 0 else numTraining):
         beQuiet = i < numTraining
+        random.seed(gameSeed(seed, i))
         if beQuiet:
                 # Suppress output and graphics
             import textDisplay
@@ -689,21 +1121,31 @@ def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, c
         else:
             gameDisplay = display
             rules.quiet = False
-        game = rules.newGame(layout, pacman, ghosts,
-                             gameDisplay, beQuiet, catchExceptions)
+        # Training games teach the agents themselves; the others get copies, as in the workers
+        gamePacman, gameGhosts = (pacman, ghosts) if beQuiet else copyAgents(pacman, ghosts)
+        game = rules.newGame(layout, gamePacman, gameGhosts,
+                             gameDisplay, beQuiet, catchExceptions, fastLoop)
         game.run()
+        if GameState.trackExplored:
+            game.exploredCount = len(GameState.explored) * GameState.exploredSample
+            game.exploredDropped = GameState.exploredDropped
+            GameState.resetExplored()
         if not beQuiet:
             games.append(game)
 
         if record:
-            import time
-            import pickle
-            fname = ('recorded-game-%d' % (i + 1)) + \
-                '-'.join([str(t) for t in time.localtime()[1:6]])
-            f = file(fname, 'w')
-            components = {'layout': layout, 'actions': game.moveHistory}
-            pickle.dump(components, f)
-            f.close()
+            recordGame(recordFile, layout, game, gameSeed(seed, i))
+
+    if workers > 0 and numGames > numTraining:
+        for i, game in enumerate(runParallelGames(layout, pacman, ghosts, range(numTraining, numGames), seed,
+                                                  workers, catchExceptions, timeout, fastLoop), numTraining):
+            if game.state.isWin():
+                print("Pacman emerges victorious! Score: %d" % game.state.data.score)
+            elif game.state.isLose():
+                print("Pacman died! Score: %d" % game.state.data.score)
+            games.append(game)
+            if record:
+                recordGame(recordFile, layout, game, gameSeed(seed, i))
 
     if (numGames-numTraining) > 0:
         scores = [game.state.getScore() for game in games]
@@ -715,10 +1157,101 @@ def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, c
               (wins.count(True), len(wins), winRate))
         print('Record:       ', ', '.join(
             [['Loss', 'Win'][int(w)] for w in wins]))
+        if GameState.trackExplored:
+            approx = '~' if GameState.exploredSample > 1 else ''
+            print('Explored:     ', ', '.join(
+                ['%s%d%s' % (approx, game.exploredCount, '+' if game.exploredDropped else '') for game in games]))
 
     return games
 
 
+def gameSeed(seed, i):
+    """
+    The random seed of game i of a runGames call whose seed is seed.
+    """
+    return '%d-%d' % (seed, i)
+
+
+def copyAgents(pacman, ghosts):
+    """
+    Fresh copies of the agents for one game, so that a game does not depend
+    on which games the same agents played before.
+    """
+    import copy
+    return copy.deepcopy(pacman), copy.deepcopy(ghosts)
+
+
+def recordFileName():
+    import time
+    return 'recorded-games-' + '-'.join([str(t) for t in time.localtime()[1:6]]) + '.pgr'
+
+
+def recordGame(filename, layout, game, seed=None):
+    """
+    Appends the game to a record file (see gameRecords.py).
+    """
+    import gameRecords
+    gameRecords.appendRecords(filename, [gameRecords.GameRecord.fromGame(game, layout, seed)])
+
+
+class GameResult:
+    """
+    The parts of a finished Game that runGames and the autograder read,
+    sent back from a worker process instead of the Game itself (which holds
+    the agents and the display).
+    """
+
+    def __init__(self, game):
+        self.state = game.state
+        self.moveHistory = game.moveHistory
+        self.agentTimeout = game.agentTimeout
+        self.agentCrashed = game.agentCrashed
+        self.exploredCount = getattr(game, 'exploredCount', None)
+        self.exploredDropped = getattr(game, 'exploredDropped', 0)
+
+
+_WORKER_GAME = {}
+
+
+def _initGameWorker(layout, pacman, ghosts, catchExceptions, timeout, explored, fastLoop):
+    import __main__
+    import textDisplay
+    __main__.__dict__['_display'] = textDisplay.NullGraphics()
+    _WORKER_GAME.update(layout=layout, pacman=pacman, ghosts=ghosts,
+                        catchExceptions=catchExceptions, timeout=timeout, fastLoop=fastLoop)
+    trackExplored, limit, sample = explored
+    GameState.setExploredTracking(trackExplored, limit, sample)
+
+
+def _playWorkerGame(seed):
+    import textDisplay
+    random.seed(seed)
+    pacman, ghosts = copyAgents(_WORKER_GAME['pacman'], _WORKER_GAME['ghosts'])
+    rules = ClassicGameRules(_WORKER_GAME['timeout'])
+    game = rules.newGame(_WORKER_GAME['layout'], pacman, ghosts, textDisplay.NullGraphics(),
+                         True, _WORKER_GAME['catchExceptions'], _WORKER_GAME['fastLoop'])
+    game.run()
+    if GameState.trackExplored:
+        game.exploredCount = len(GameState.explored) * GameState.exploredSample
+        game.exploredDropped = GameState.exploredDropped
+        GameState.resetExplored()
+    return GameResult(game)
+
+
+def runParallelGames(layout, pacman, ghosts, gameNumbers, seed, workers, catchExceptions=False, timeout=30,
+                     fastLoop=False):
+    """
+    Plays the given games in a pool of worker processes with no display and
+    returns their GameResults in game order.  Game i is seeded with
+    gameSeed(seed, i), as runGames seeds it without workers.
+    """
+    from multiprocessing import Pool
+    explored = (GameState.trackExplored, GameState.exploredLimit, GameState.exploredSample)
+    seeds = [gameSeed(seed, i) for i in gameNumbers]
+    with Pool(workers, _initGameWorker, (layout, pacman, ghosts, catchExceptions, timeout, explored, fastLoop)) as pool:
+        return list(pool.imap(_playWorkerGame, seeds))
+
+
 if __name__ == '__main__':
     """
     The main function called when pacman.py is run
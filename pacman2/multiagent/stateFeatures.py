@@ -0,0 +1,173 @@
+# stateFeatures.py
+# ----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Evaluation features of a state, carried forward from its predecessor.
+
+Between a state and its successor one agent moves and at most one pellet or
+capsule is eaten (GameStateData._agentMoved, _foodEaten, _capsuleEaten).
+StateFeatures keeps the aggregates evaluation functions keep recomputing:
+
+    foodSum         sum of 1/(d+1) over the food, d the Manhattan distance
+                    from Pacman
+    nearestFood     Manhattan distance of the closest pellet (inf if none)
+    capsuleSum      sum of 1/(d+1) over the capsules
+    ghostDistances  Manhattan distance from Pacman of every ghost
+
+and a successor's features are derived from its predecessor's with those
+deltas: a ghost move changes one ghost distance, and the food terms are
+shared (FoodSums) by all the states with the same food left, per Pacman
+position.  Eating a pellet derives the new FoodSums by subtracting that
+pellet's weight.
+
+GameState.getFeatures() uses the predecessor only with feature tracking on
+(GameState.setFeatureTracking), which links every successor to its
+predecessor until its features are computed.  Game.run turns it on for the
+games of agents that set usesFeatureTracking.
+"""
+
+from util import manhattanDistance
+from batchEvaluation import getBatchEvaluator
+
+# Predecessors followed at most to find computed features
+MAX_CHAIN = 16
+
+
+class FoodSums:
+    """
+    (foodSum, nearestFood) per Pacman position for one set of food, filled
+    in on demand.  A FoodSums made by eat() computes a position from the
+    previous food's entry when that one is known.
+    """
+    __slots__ = ('evaluator', 'bits', 'sums', 'parentSums', 'eaten')
+
+    def __init__(self, evaluator, bits, parentSums=None, eaten=None):
+        self.evaluator = evaluator
+        self.bits = bits
+        self.sums = {}
+        # only the previous food's dict, not the FoodSums, so the chain is not kept alive
+        self.parentSums = parentSums
+        self.eaten = eaten
+
+    def get(self, pos):
+        entry = self.sums.get(pos)
+        if entry is not None:
+            return entry
+        if self.parentSums is not None:
+            parent = self.parentSums.get(pos)
+            if parent is not None:
+                d = manhattanDistance(pos, self.eaten)
+                if parent[1] < d:
+                    nearest = parent[1]
+                else:
+                    nearest = self.evaluator.foodTerms(self.bits, pos)[1]
+                entry = (parent[0] - 1.0 / (d + 1), nearest)
+        if entry is None:
+            entry = self.evaluator.foodTerms(self.bits, pos)
+        self.sums[pos] = entry
+        return entry
+
+    def eat(self, pos, bits):
+        return FoodSums(self.evaluator, bits, self.sums, pos)
+
+
+class StateFeatures:
+    """
+    The features of one state (see the module docstring).
+    """
+    __slots__ = ('pacman', 'foodSums', 'foodSum', 'nearestFood', 'capsuleSum', 'ghostDistances')
+
+    def fromState(state):
+        """
+        Features computed from scratch, for a GameState or a SearchState.
+        """
+        return StateFeatures.compute(state.getWalls(), state.getFood(), state.getPacmanPosition(),
+                                     state.getCapsules(), state.getGhostPositions())
+    fromState = staticmethod(fromState)
+
+    def fromData(data):
+        agentStates = data.agentStates
+        return StateFeatures.compute(data.layout.walls, data.food, agentStates[0].getPosition(),
+                                     data.capsules, [ghost.getPosition() for ghost in agentStates[1:]])
+    fromData = staticmethod(fromData)
+
+    def compute(walls, food, pacman, capsules, ghostPositions):
+        bits = getattr(food, 'bits', None)
+        if bits is None:
+            from game import BitGrid
+            bits = BitGrid.fromGrid(food).bits
+        features = StateFeatures()
+        features.foodSums = FoodSums(getBatchEvaluator(walls), bits)
+        features.setPacman(pacman, capsules, ghostPositions)
+        return features
+    compute = staticmethod(compute)
+
+    def setPacman(self, pos, capsules, ghostPositions):
+        self.pacman = pos
+        self.foodSum, self.nearestFood = self.foodSums.get(pos)
+        self.capsuleSum = sum(1.0 / (manhattanDistance(pos, capsule) + 1) for capsule in capsules)
+        self.ghostDistances = tuple(manhattanDistance(pos, ghost) for ghost in ghostPositions)
+
+    def successor(self, data):
+        """
+        The features of the state whose GameStateData is data, a successor
+        of the state of these features.
+        """
+        features = StateFeatures()
+        foodSums = self.foodSums
+        if data._foodEaten is not None:
+            foodSums = foodSums.eat(data._foodEaten, data.food.bits)
+        features.foodSums = foodSums
+        agentIndex = data._agentMoved
+        agentStates = data.agentStates
+        if agentIndex == 0 or data._capsuleEaten is not None:
+            features.setPacman(agentStates[0].getPosition(), data.capsules,
+                               [ghost.getPosition() for ghost in agentStates[1:]])
+            return features
+        features.pacman = self.pacman
+        features.foodSum, features.nearestFood = self.foodSum, self.nearestFood
+        features.capsuleSum = self.capsuleSum
+        # a ghost moved (or was eaten and sent home): only its own distance changes
+        distances = list(self.ghostDistances)
+        distances[agentIndex - 1] = manhattanDistance(self.pacman, agentStates[agentIndex].getPosition())
+        features.ghostDistances = tuple(distances)
+        return features
+
+
+def getDataFeatures(state):
+    """
+    The features of a GameState, derived from the closest predecessor with
+    computed features (see GameState.setFeatureTracking) and cached on the
+    way down.
+    """
+    data = state.data
+    path = []
+    while data._features is None:
+        path.append(data)
+        parent = data._featureParent
+        if parent is None or len(path) > MAX_CHAIN:
+            break
+        data = parent
+    if data._features is None:
+        top = path.pop()
+        top._features = StateFeatures.fromData(top)
+        top._featureParent = None
+        features = top._features
+    else:
+        features = data._features
+    for data in reversed(path):
+        features = data._features = features.successor(data)
+        data._featureParent = None
+    return features
+
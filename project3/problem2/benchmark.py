@@ -0,0 +1,213 @@
+"""
+Benchmark / regression suite για τον SetPartitionSolver.
+
+Για κάθε instance κρατάμε: βέλτιστο κόστος, κόμβους που ανοίχτηκαν,
+μνήμη (peak του tracemalloc στην επίλυση, bytes του PairingStore,
+εγγραφές του transposition table) και χρόνο (wall time), και τα γράφουμε
+σε JSON μαζί με το πλήθος των jobs.
+Αν δοθεί baseline, συγκρίνουμε και αποτυγχάνουμε (exit code 1) όταν:
+  - αλλάξει το κόστος (λάθος λύση),
+  - λείπει από τα αποτελέσματα κάποιο instance του baseline,
+  - ο χρόνος χειροτερέψει πάνω από το όριο (--threshold), ή
+  - το baseline μετρήθηκε με άλλο --jobs (οι χρόνοι δεν συγκρίνονται).
+
+Παραδείγματα:
+  python3 benchmark.py                          # όλα τα instances, σύγκριση με το baseline
+  python3 benchmark.py --jobs 4                 # παράλληλα σε 4 processes
+  python3 benchmark.py --update-baseline        # γράφει νέο baseline
+  python3 benchmark.py --check-log results.log  # μόνο κόστη, απέναντι στο results.log
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from multiprocessing import Pool
+
+from pairing_solver import SetPartitionSolver, load_columnar
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, 'benchmark_baseline.json')
+
+# Κάτω από αυτόν τον χρόνο (δευτερόλεπτα) οι διαφορές είναι θόρυβος
+MIN_TIME = 0.1
+
+
+def solve_instance(filename):
+    """
+    Διαβάζει και λύνει ένα instance, επιστρέφει (data, solver, cost, solution).
+    """
+    data = load_columnar(filename)
+    solver = SetPartitionSolver(data.num_flights, data)
+    # Ο solver τυπώνει την αρχή της επίλυσης, εδώ δεν μας ενδιαφέρει
+    with contextlib.redirect_stdout(io.StringIO()):
+        cost, solution = solver.solve()
+    return data, solver, cost, solution
+
+
+def run_instance(filename, repeat=1):
+    """
+    Λύνει ένα instance και επιστρέφει τις μετρήσεις του.
+    Με repeat > 1 κρατάμε τον καλύτερο χρόνο (λιγότερος θόρυβος).
+    Η μνήμη μετριέται σε ένα επιπλέον τρέξιμο με tracemalloc, που
+    μετράει μόνο ό,τι δεσμεύεται στο διάβασμα και την επίλυση (όχι όλο
+    το process) αλλά καθυστερεί πολύ την Python, άρα όχι στα χρονομετρημένα.
+    """
+    wall_time = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        solve_instance(filename)
+        wall_time = min(wall_time, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        data, solver, cost, solution = solve_instance(filename)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return os.path.basename(filename), {
+        'cost': cost,
+        'count': len(solution),
+        'nodes': solver.nodes,
+        'peak_traced_kb': peak // 1024,
+        'store_bytes': data.nbytes(),
+        'tt_entries': len(solver.memo),
+        'wall_time': round(wall_time, 4),
+    }
+
+
+def run_all(filenames, jobs=1, repeat=1):
+    """
+    Τρέχει όλα τα instances (παράλληλα αν jobs > 1) και επιστρέφει dict όνομα -> μετρήσεις.
+    """
+    with Pool(processes=jobs, maxtasksperchild=1) as pool:
+        results = pool.starmap(run_instance, [(f, repeat) for f in filenames], chunksize=1)
+    return dict(sorted(results))
+
+
+def compare(results, baseline, threshold):
+    """
+    Συγκρίνει με το baseline. Επιστρέφει λίστα με τα προβλήματα που βρέθηκαν.
+    """
+    failures = []
+    for name in sorted(set(baseline) - set(results)):
+        failures.append(f"{name}: υπάρχει στο baseline αλλά λείπει από τα αποτελέσματα")
+
+    for name, res in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<12} | NEW (δεν υπάρχει στο baseline)")
+            continue
+
+        if res['cost'] != base['cost']:
+            failures.append(f"{name}: cost {base['cost']} -> {res['cost']}")
+
+        # Χρόνος: αποτυγχάνουμε μόνο αν είναι και πάνω από το όριο θορύβου
+        limit = max(base['wall_time'] * (1 + threshold), MIN_TIME)
+        if res['wall_time'] > limit:
+            failures.append(f"{name}: wall time {base['wall_time']:.3f}s -> {res['wall_time']:.3f}s "
+                            f"(όριο {limit:.3f}s)")
+
+        ratio = res['wall_time'] / base['wall_time'] if base['wall_time'] > 0 else float('inf')
+        print(f"{name:<12} | cost {res['cost']:<8} | nodes {base['nodes']:>8} -> {res['nodes']:<8} | "
+              f"time {base['wall_time']:.3f}s -> {res['wall_time']:.3f}s (x{ratio:.2f}) | "
+              f"peak {res['peak_traced_kb']}KB | store {res['store_bytes']}B | TT {res['tt_entries']}")
+    return failures
+
+
+def check_log(results, filename):
+    """
+    Συγκρίνει τα κόστη με τις γραμμές RESULT ενός log του Makefile
+    (make save_results). Επιστρέφει λίστα με τα προβλήματα που βρέθηκαν.
+    """
+    expected = {}
+    with open(filename) as f:
+        for line in f:
+            if not line.startswith('RESULT |'):
+                continue
+            fields = dict(part.strip().split(': ', 1) for part in line.split('|')[1:4])
+            expected[os.path.basename(fields['File'])] = int(fields['Cost'])
+
+    failures = []
+    for name in sorted(set(expected) - set(results)):
+        failures.append(f"{name}: υπάρχει στο {filename} αλλά λείπει από τα αποτελέσματα")
+    for name, res in results.items():
+        if name not in expected:
+            failures.append(f"{name}: δεν υπάρχει στο {filename}")
+        elif res['cost'] != expected[name]:
+            failures.append(f"{name}: cost {expected[name]} ({filename}) -> {res['cost']}")
+        else:
+            print(f"{name:<12} | cost {res['cost']:<8} | ίδιο με το {filename}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark/regression suite για το problem2")
+    parser.add_argument('instances', nargs='*',
+                        help="αρχεία instances (default: όλα τα NxM.txt αυτού του φακέλου)")
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="πόσα instances τρέχουν παράλληλα (οι χρόνοι έχουν περισσότερο θόρυβο)")
+    parser.add_argument('--repeat', '-r', type=int, default=3,
+                        help="πόσες φορές τρέχει κάθε instance (κρατάμε τον καλύτερο χρόνο)")
+    parser.add_argument('--output', '-o', default=None,
+                        help="αρχείο JSON για τις μετρήσεις αυτού του τρεξίματος")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help="JSON baseline για σύγκριση")
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help="επιτρεπτή επιβάρυνση χρόνου (0.5 = +50%%)")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="γράφει τις μετρήσεις ως νέο baseline αντί να συγκρίνει")
+    parser.add_argument('--check-log', default=None, metavar='LOG',
+                        help="ελέγχει μόνο τα κόστη απέναντι στις γραμμές RESULT του LOG (π.χ. results.log)")
+    args = parser.parse_args(argv)
+
+    filenames = args.instances or sorted(glob.glob(os.path.join(HERE, '[0-9]*x[0-9]*.txt')))
+    results = run_all(filenames, args.jobs, args.repeat)
+
+    # Οι χρόνοι εξαρτώνται από το πόσα instances τρέχουν μαζί: κρατάμε και τα jobs
+    report = {'jobs': args.jobs, 'instances': results}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.check_log:
+        failures = check_log(results, args.check_log)
+    else:
+        if args.update_baseline:
+            with open(args.baseline, 'w') as f:
+                json.dump(report, f, indent=2)
+                f.write('\n')
+            print(f"Baseline ενημερώθηκε: {args.baseline} ({len(results)} instances, jobs={args.jobs})")
+            return 0
+
+        if not os.path.exists(args.baseline):
+            print(f"Δεν βρέθηκε baseline ({args.baseline}), τρέξε με --update-baseline")
+            print(json.dumps(report, indent=2))
+            return 1
+
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        if baseline.get('jobs') != args.jobs:
+            print(f"FAIL\n  το baseline μετρήθηκε με jobs={baseline.get('jobs')}, τώρα jobs={args.jobs}: "
+                  f"τρέξε με το ίδιο --jobs ή ξαναγράψε το baseline")
+            return 1
+
+        failures = compare(results, baseline['instances'], args.threshold)
+    if failures:
+        print("FAIL")
+        for failure in failures:
+            print("  " + failure)
+        return 1
+    print(f"OK ({len(results)} instances)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,11 @@
+import json
+import os
 import sys
+import time
+from array import array
+from collections import OrderedDict
+from itertools import accumulate, chain, repeat
+from operator import sub, truediv
 
 def parse_dataset(filename):
     pairings = []
@@ -31,8 +38,193 @@ def parse_dataset(filename):
             current_id += 1 # Αυξάνουμε το ID για τον επόμενο
             
     return num_flights, pairings
+
+class PairingStore:
+    """
+    Columnar αποθήκη για τα pairings (αντί για ένα dict + set ανά pairing).
+    Όλα τα δεδομένα ζουν σε επίπεδους πίνακες (array), σε μορφή CSR:
+
+    - costs[j]:                                  κόστος του pairing j
+    - flights[offsets[j]:offsets[j+1]]:          οι πτήσεις του pairing j
+    - flight_pairings[flight_offsets[f-1]:flight_offsets[f]]:
+                                                 τα pairings που καλύπτουν την πτήση f
+
+    Το pairing j έχει ID j+1 (σειρά στο αρχείο), εκτός αν δοθεί πίνακας ids.
+    Έτσι κάθε pairing κοστίζει μερικά bytes (κόστος + offset + 4 ανά πτήση
+    + 4 ανά εγγραφή στο ευρετήριο) αντί για εκατοντάδες.
+    """
+
+    def __init__(self, num_flights, costs, offsets, flights, ids=None):
+        self.num_flights = num_flights
+        self.costs = costs
+        self.offsets = offsets
+        self.flights = flights
+        self.ids = ids
+        self._build_flight_index()
+
+    def _build_flight_index(self):
+        """
+        Φτιάχνει το ευρετήριο πτήση -> pairings σε CSR (counting sort).
+        Ένα πέρασμα μοιράζει τα pairings σε κάδους ανά πτήση· τα offsets
+        βγαίνουν από τα μεγέθη των κάδων και ο πίνακας από τη συνένωσή τους.
+        """
+        n = self.num_flights
+        flights, offsets = self.flights, self.offsets
+
+        # owner[k] = το pairing στο οποίο ανήκει η θέση k του flights
+        lengths = map(sub, offsets[1:], offsets[:-1])
+        owner = chain.from_iterable(map(repeat, range(len(self.costs)), lengths))
+
+        # Γεμίζουμε με τη σειρά του αρχείου, ώστε να μένει η ίδια σειρά δοκιμών
+        buckets = [array('i') for _ in range(n + 1)]
+        appends = [bucket.append for bucket in buckets]
+        for f, j in zip(flights, owner):
+            appends[f](j)
+
+        # Prefix sums των πληθών: flight_offsets[f-1] = πού ξεκινάει η πτήση f
+        self.flight_offsets = array('i', accumulate(map(len, buckets)))
+        self.flight_pairings = array('i', b''.join(map(bytes, buckets)))
+
+    @classmethod
+    def from_pairings(cls, num_flights, pairings):
+        """
+        Φτιάχνει store από τη λίστα με dicts που επιστρέφει το parse_dataset.
+        """
+        costs = array('q')
+        offsets = array('i', [0])
+        flights = array('i')
+        ids = array('i')
+        for p in pairings:
+            costs.append(p['cost'])
+            flights.extend(sorted(p['flights']))
+            offsets.append(len(flights))
+            ids.append(p['id'])
+        return cls(num_flights, costs, offsets, flights, ids)
+
+    def __len__(self):
+        return len(self.costs)
+
+    def pairing_id(self, j):
+        return j + 1 if self.ids is None else self.ids[j]
+
+    def pairing_flights(self, j):
+        return self.flights[self.offsets[j]:self.offsets[j + 1]]
+
+    def pairing_mask(self, j):
+        """
+        Bitmask των πτήσεων του pairing j (bit f-1 για την πτήση f).
+        """
+        mask = 0
+        flights = self.flights
+        for k in range(self.offsets[j], self.offsets[j + 1]):
+            mask |= 1 << (flights[k] - 1)
+        return mask
+
+    def candidates(self, flight):
+        """
+        Τα pairings (δείκτες j) που καλύπτουν την πτήση flight.
+        """
+        return self.flight_pairings[self.flight_offsets[flight - 1]:self.flight_offsets[flight]]
+
+    def num_candidates(self, flight):
+        return self.flight_offsets[flight] - self.flight_offsets[flight - 1]
+
+    def nbytes(self):
+        """
+        Συνολική μνήμη των πινάκων σε bytes.
+        """
+        arrays = [self.costs, self.offsets, self.flights, self.flight_offsets, self.flight_pairings]
+        if self.ids is not None:
+            arrays.append(self.ids)
+        return sum(a.itemsize * len(a) for a in arrays)
+
+
+def load_columnar(filename):
+    """
+    Διαβάζει ένα dataset κατευθείαν σε PairingStore, χωρίς dict/set ανά pairing.
+    Το αρχείο διαβάζεται με μία κλήση, σπάει σε αριθμούς μία φορά, και κάθε
+    pairing μπαίνει στους επίπεδους πίνακες με ένα slice (κόστος, πλήθος, πτήσεις).
+    """
+    costs = array('q')
+    offsets = array('i', [0])
+    flights = array('i')
+    with open(filename, 'rb') as f:
+        tokens = f.read().split()
+    if not tokens:
+        return PairingStore(0, costs, offsets, flights)
+
+    num_flights = int(tokens[0])
+    values = array('q', map(int, tokens))
+    all_flights = array('q')
+    pos, end = 2, len(values)
+    while pos < end:
+        # Κόστος, πλήθος πτήσεων, πτήσεις
+        k = values[pos + 1]
+        costs.append(values[pos])
+        all_flights += values[pos + 2:pos + 2 + k]
+        offsets.append(len(all_flights))
+        pos += 2 + k
+    flights = array('i', all_flights)
+
+    return PairingStore(num_flights, costs, offsets, flights)
+
+
+class SearchInterrupted(Exception):
+    """
+    Σήμα ότι η αναζήτηση πρέπει να σταματήσει (έληξε το time limit).
+    Το πιάνει το solve() και επιστρέφει την καλύτερη λύση μέχρι τώρα.
+    """
+    pass
+
+
+class TranspositionTable:
+    """
+    Πίνακας μετατοπίσεων (transposition table) για τα υποπροβλήματα του _search.
+    Το ίδιο σύνολο ακάλυπτων πτήσεων φτάνεται συχνά με διαφορετική σειρά
+    επιλογής pairings, οπότε το λύνουμε μία φορά και το θυμόμαστε.
+
+    Κλειδί: bitmask των ακάλυπτων πτήσεων (bit f-1 για την πτήση f).
+    Τιμή:   (EXACT, κόστος, συμπλήρωση) -> το βέλτιστο κόστος συμπλήρωσης
+                                          και τα IDs των pairings της.
+            (LOWER, φράγμα, None)       -> το υποδέντρο κόπηκε, άρα ξέρουμε
+                                          μόνο ένα κάτω φράγμα για το κόστος.
+    Η μνήμη είναι φραγμένη: όταν γεμίσει πετάμε την εγγραφή που
+    χρησιμοποιήθηκε λιγότερο πρόσφατα (LRU).
+    """
+    EXACT = 0
+    LOWER = 1
+
+    def __init__(self, max_entries=200000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, mask):
+        entry = self.entries.get(mask)
+        if entry is None:
+            self.misses += 1
+            return None
+        # Η εγγραφή μόλις χρησιμοποιήθηκε, πάει στο "νέο" άκρο της ουράς
+        self.entries.move_to_end(mask)
+        self.hits += 1
+        return entry
+
+    def store(self, mask, kind, value, completion=None):
+        if self.max_entries <= 0:
+            return
+        self.entries[mask] = (kind, value, completion)
+        self.entries.move_to_end(mask)
+        if len(self.entries) > self.max_entries:
+            # Διώχνουμε την παλαιότερη (least recently used) εγγραφή
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+
 class SetPartitionSolver:
-    def __init__(self, num_flights, pairings):
+    def __init__(self, num_flights, pairings, tt_size=200000):
         # Αποθηκεύουμε τα βασικά δεδομένα
         self.num_flights = num_flights
         self.pairings = pairings 
@@ -43,30 +235,84 @@ class SetPartitionSolver:
         # ώστε η πρώτη έγκυρη λύση που θα βρούμε να είναι σίγουρα μικρότερη.
         self.best_solution = []
         self.best_cost = float('inf')
+
+        # --- MEMOIZATION ---
+        # Πίνακας με τα υποπροβλήματα που έχουμε ήδη λύσει (ή κόψει).
+        self.memo = TranspositionTable(tt_size)
         
         # --- ΤΟ ΕΥΡΕΤΗΡΙΟ (INDEXING) ---
-        # Φτιάχνουμε έναν γρήγορο χάρτη.
-        # Δομή: Λεξικό (Dictionary).
-        # Κλειδί (Key): Αριθμός Πτήσης (int)
-        # Τιμή (Value): Λίστα με τα Pairings που την καλύπτουν.
-        
-        # 1. Δημιουργούμε κενές λίστες για κάθε πτήση (από 1 έως N)
-        self.flight_index = {i: [] for i in range(1, num_flights + 1)}
-        
-        # 2. Γεμίζουμε το ευρετήριο
-        for p in pairings:
-            # Για κάθε πτήση που υπάρχει μέσα σε αυτό το pairing...
-            for flight in p['flights']:
-                # ...πρόσθεσε αυτό το pairing στη λίστα της συγκεκριμένης πτήσης.
-                self.flight_index[flight].append(p)
+        # Όλα τα δεδομένα (κόστη, πτήσεις, ευρετήριο πτήση -> pairings)
+        # βρίσκονται σε ένα PairingStore. Αν μας δώσουν τη λίστα με τα dicts
+        # του parse_dataset, τη μετατρέπουμε μία φορά εδώ.
+        if isinstance(pairings, PairingStore):
+            self.store = pairings
+        else:
+            self.store = PairingStore.from_pairings(num_flights, pairings)
 
-    def solve(self):    
+        # --- ANYTIME / ΣΤΑΤΙΣΤΙΚΑ ---
+        self.nodes = 0            # πόσους κόμβους (κλήσεις _search) ανοίξαμε
+        self.optimal = False      # True μόνο αν η αναζήτηση τελείωσε ολόκληρη
+        self.elapsed = 0.0
+        self.deadline = None      # time.monotonic() πέρα από το οποίο σταματάμε
+        self.progress_interval = None
+        self.verbose = False      # τυπώνουμε κάθε νέα καλύτερη λύση;
+        self.results_file = None
+        self.instance = None
+
+        # Κόστος ανά καλυπτόμενη πτήση, μία φορά για κάθε pairing
+        store = self.store
+        share = array('d', map(truediv, store.costs, map(sub, store.offsets[1:], store.offsets[:-1])))
+
+        # Κάτω φράγμα: κάθε πτήση θα "πληρώσει" τουλάχιστον το φθηνότερο
+        # κόστος ανά πτήση ανάμεσα στα pairings που την καλύπτουν.
+        self.flight_share = []
+        for f in range(1, num_flights + 1):
+            self.flight_share.append(min(map(share.__getitem__, store.candidates(f)), default=float('inf')))
+        self.root_lower_bound = sum(self.flight_share)
+        # Το lower_bound μένει το φράγμα της ρίζας όσο τρέχει η αναζήτηση: το DFS
+        # δεν ενημερώνει το φράγμα από τους ανοιχτούς κόμβους. Γίνεται ίσο με
+        # το κόστος μόνο όταν η αναζήτηση τελειώσει (αποδεδειγμένα βέλτιστη).
+        self.lower_bound = self.root_lower_bound
+
+        # --- DYNAMIC BRANCHING ---
+        # feasible[j] = 1 όσο το pairing j μπορεί ακόμα να επιλεγεί.
+        # remaining[f] = πόσα επιλέξιμα pairings καλύπτουν ακόμα την πτήση f,
+        # δηλαδή το MRV βλέπει τις πραγματικές επιλογές και όχι το στατικό ευρετήριο.
+        # Ενημερώνονται αυξητικά: το _select βγάζει τα pairings που συγκρούονται
+        # και τα σπρώχνει στη στοίβα removed, μαζί με ένα αντίγραφο των μετρητών
+        # στη στοίβα saved· το _undo τα επαναφέρει στο backtrack.
+        self.feasible = bytearray(b'\x01') * len(store)
+        self.remaining = array('i', [0])
+        self.remaining.extend(store.num_candidates(f) for f in range(1, num_flights + 1))
+        self.removed = array('i')
+        self.saved = []
+
+        # Σειρά δοκιμών: για κάθε πτήση, τα pairings της με αύξον κόστος ανά
+        # καλυπτόμενη πτήση, ώστε οι καλές λύσεις να βρίσκονται νωρίς.
+        # (Ίδια μορφή CSR με το store.flight_pairings.)
+        self.branch_order = array('i')
+        for f in range(1, num_flights + 1):
+            self.branch_order.extend(sorted(store.candidates(f), key=share.__getitem__))
+
+    def solve(self, time_limit=None, progress_interval=None, results_file=None, instance=None,
+              verbose=False):
     
         """
         Ξεκινάει τη διαδικασία επίλυσης.
+
+        Anytime mode:
+        - time_limit:        δευτερόλεπτα. Μόλις λήξει σταματάμε καθαρά και
+                             επιστρέφουμε την καλύτερη λύση μέχρι τώρα.
+        - progress_interval: κάθε πόσα δευτερόλεπτα τυπώνουμε incumbent,
+                             κάτω φράγμα, gap και κόμβους/δευτερόλεπτο.
+        - results_file:      κάθε νέα καλύτερη λύση γράφεται εκεί (atomically),
+                             ώστε να μη χαθεί τίποτα αν διακοπεί το τρέξιμο.
+        - verbose:           τυπώνει κάθε νέα καλύτερη λύση (το ίδιο και
+                             όταν δοθεί progress_interval).
+        Το self.optimal λέει αν η λύση αποδείχθηκε βέλτιστη.
         """
-        # Χρησιμοποιούμε set για να αφαιρούμε εύκολα όσες καλύπτουμε.
-        all_flights = set(range(1, self.num_flights + 1))
+        # Bitmask με όλες τις πτήσεις ακάλυπτες (bits 0..N-1 = 1).
+        all_flights = (1 << self.num_flights) - 1
         
         print(f"Start solving for {self.num_flights} flights...")
         
@@ -75,88 +321,307 @@ class SetPartitionSolver:
         #   - uncovered_flights: Πτήσεις που μένουν να καλυφθούν
         #   - current_cost: Πόσο έχουμε ξοδέψει μέχρι τώρα (0 αρχικά)
         #   - current_solution: Η λίστα με τα ID των pairings που διαλέξαμε (κενή αρχικά)
-        self._search(all_flights, 0, [])
+        self.progress_interval = progress_interval
+        self.verbose = verbose or bool(progress_interval)
+        self.results_file = results_file
+        self.instance = instance
+        self.start_time = time.monotonic()
+        self.last_report = self.start_time
+        if time_limit is not None:
+            self.deadline = self.start_time + time_limit
+
+        # Αν ένα προηγούμενο solve διακόπηκε, επαναφέρουμε όλα τα pairings
+        self._undo(0)
+        try:
+            self._search(all_flights, 0, [])
+            # Η αναζήτηση τελείωσε: η λύση είναι βέλτιστη (ή δεν υπάρχει λύση).
+            self.optimal = True
+            self.lower_bound = self.best_cost
+        except (SearchInterrupted, KeyboardInterrupt):
+            print("Διακοπή αναζήτησης, κρατάμε την καλύτερη λύση μέχρι τώρα.")
+        self.elapsed = time.monotonic() - self.start_time
+        self.deadline = None
+
+        if self.progress_interval:
+            self._report()
+        self._save_results()
         
         # 3. Επιστρέφουμε το αποτέλεσμα
         return self.best_cost, self.best_solution
+
+    def gap(self):
+        """
+        Σχετική απόσταση incumbent - κάτω φράγματος (0.0 = αποδεδειγμένα βέλτιστη).
+        Πριν τελειώσει η αναζήτηση το κάτω φράγμα είναι αυτό της ρίζας
+        (root_lower_bound), άρα το gap είναι άνω όριο της πραγματικής απόστασης.
+        """
+        if self.best_cost == float('inf'):
+            return float('inf')
+        if self.best_cost == 0:
+            return 0.0
+        return max(0.0, (self.best_cost - self.lower_bound) / self.best_cost)
+
+    def _report(self):
+        """
+        Τυπώνει μια γραμμή προόδου για το anytime mode.
+        """
+        now = time.monotonic()
+        elapsed = now - self.start_time
+        rate = self.nodes / elapsed if elapsed > 0 else 0.0
+        print(f"PROGRESS | t={elapsed:.1f}s | incumbent={self.best_cost} | "
+              f"lower bound={self.lower_bound:.1f} | gap={100 * self.gap():.2f}% | "
+              f"nodes={self.nodes} | nodes/s={rate:.0f}")
+        self.last_report = now
+
+    def _check_time(self):
+        """
+        Καλείται περιοδικά από το _search: reports προόδου και έλεγχος time limit.
+        """
+        now = time.monotonic()
+        if self.progress_interval and now - self.last_report >= self.progress_interval:
+            self._report()
+        if self.deadline is not None and now >= self.deadline:
+            raise SearchInterrupted()
+
+    def _save_results(self):
+        """
+        Γράφει την τρέχουσα καλύτερη λύση στο results_file.
+        Γράφουμε πρώτα σε προσωρινό αρχείο και μετά os.replace, ώστε το αρχείο
+        να είναι πάντα είτε η παλιά είτε η νέα λύση, ποτέ μισογραμμένο.
+        """
+        if not self.results_file:
+            return
+        result = {
+            'file': self.instance,
+            'cost': self.best_cost if self.best_cost != float('inf') else None,
+            'count': len(self.best_solution),
+            'pairings': sorted(self.best_solution),
+            'optimal': self.optimal,
+            'lower_bound': self.lower_bound if self.lower_bound != float('inf') else None,
+            'nodes': self.nodes,
+            'elapsed': round(time.monotonic() - self.start_time, 3),
+        }
+        tmp = self.results_file + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(result, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.results_file)
+
+    def _new_best(self, cost, solution):
+        """
+        Κρατάει μια νέα καλύτερη λύση (incumbent).
+        """
+        self.best_cost = cost
+        # Αποθηκεύουμε αντίγραφο (list(...)) της λύσης
+        self.best_solution = list(solution)
+        if self.verbose:
+            print(f"Βρέθηκε νέα καλύτερη λύση! Κόστος: {self.best_cost}")
+        self._save_results()
     
-    def _search(self, uncovered_flights, current_cost, current_solution):
+    def _select(self, j):
+        """
+        Διαλέγουμε το j: όσα επιλέξιμα pairings μοιράζονται έστω και μία πτήση
+        μαζί του (και το ίδιο το j) παύουν να είναι επιλέξιμα. Για καθένα
+        μειώνουμε τον μετρητή remaining των πτήσεών του και το γράφουμε στο removed.
+        """
+        store = self.store
+        offsets, flights = store.offsets, store.flights
+        flight_offsets, flight_pairings = store.flight_offsets, store.flight_pairings
+        feasible, remaining, removed = self.feasible, self.remaining, self.removed
+        # Οι μετρητές είναι N+1 ακέραιοι: ένα αντίγραφο (σε C) κοστίζει λιγότερο
+        # από το να ξαναπροσθέσουμε ένα-ένα όσα αφαιρούμε εδώ.
+        self.saved.append((len(removed), remaining[:]))
+        for f in flights[offsets[j]:offsets[j + 1]]:
+            for p in flight_pairings[flight_offsets[f - 1]:flight_offsets[f]]:
+                if feasible[p]:
+                    feasible[p] = 0
+                    removed.append(p)
+                    for g in flights[offsets[p]:offsets[p + 1]]:
+                        remaining[g] -= 1
+
+    def _undo(self, mark):
+        """
+        Backtrack: επαναφέρει τα pairings της στοίβας removed μέχρι το μήκος mark
+        και τους μετρητές όπως ήταν πριν από το αντίστοιχο _select.
+        """
+        removed, saved, feasible = self.removed, self.saved, self.feasible
+        if len(removed) <= mark:
+            return
+        while saved and saved[-1][0] >= mark:
+            counts = saved.pop()[1]
+        self.remaining[:] = counts
+        for p in removed[mark:]:
+            feasible[p] = 1
+        del removed[mark:]
+
+    def _search(self, uncovered_flights, current_cost, current_solution, last=None):
         """
         Η καρδιά του αλγορίθμου.
-        - uncovered_flights: Set με τις πτήσεις που δεν έχουν καλυφθεί ακόμα.
+        - uncovered_flights: Bitmask με τις πτήσεις που δεν έχουν καλυφθεί ακόμα.
         - current_cost: Το κόστος μέχρι στιγμής.
         - current_solution: Λίστα με τα ID των pairings που έχουμε διαλέξει.
+        - last: Το pairing που μόλις διαλέξαμε (None στη ρίζα). Το _select του
+          γίνεται εδώ, μόνο αν ο κόμβος δεν κοπεί από το pruning ή το memo,
+          και το _undo στον γονιό.
+        Τα pairings που μπορούν ακόμα να επιλεγούν είναι στο self.feasible.
+
+        Επιστρέφει το κόστος της καλύτερης συμπλήρωσης που βρέθηκε σε αυτό
+        το υποδέντρο και βελτίωσε τη λύση, αλλιώς float('inf').
         """
         
+        # Μετράμε τον κόμβο και κάθε 1024 κόμβους κοιτάμε το ρολόι
+        self.nodes += 1
+        if not self.nodes & 1023 and (self.deadline is not None or self.progress_interval):
+            self._check_time()
+
         # --- 1. BASE CASE (ΕΠΙΤΥΧΙΑ) ---
-        # Αν το σύνολο uncovered_flights είναι άδειο, σημαίνει καλύψαμε τα πάντα
+        # Αν δεν έχει μείνει κανένα bit, σημαίνει καλύψαμε τα πάντα
         if not uncovered_flights:
             # Βρήκαμε μια λύση. Είναι καλύτερη από την προηγούμενη;
             if current_cost < self.best_cost:
-                self.best_cost = current_cost
-                # Αποθηκεύουμε αντίγραφο (list(...)) της λύσης
-                self.best_solution = list(current_solution)
-                print(f"Βρέθηκε νέα καλύτερη λύση! Κόστος: {self.best_cost}")
-            return # Τέλος αυτού του μονοπατιού.
+                self._new_best(current_cost, current_solution)
+                return 0
+            return float('inf') # Τέλος αυτού του μονοπατιού.
 
         # --- 2. PRUNING ---
         # Branch & Bound: Αν ήδη έχουμε ξεπεράσει το κόστος της καλύτερης λύσης
         # που βρήκαμε νωρίτερα, σταματάμε.
-        if current_cost >= self.best_cost:
-            return
+        # budget = πόσο μπορεί να κοστίσει το υπόλοιπο ώστε να βελτιώσουμε τη λύση.
+        budget = self.best_cost - current_cost
+        if budget <= 0:
+            return float('inf')
 
-        # --- 3. HEURISTIC MRV ---
-        # ΟΧΙ την πρώτη τυχαία. Διαλέγουμε αυτή που έχει τις ΛΙΓΟΤΕΡΕΣ επιλογές (pairings) στο ευρετήριο.
-        
-        # Η εντολή min ψάχνει μέσα στο uncovered_flights.
-        # Το key=lambda f: ... λέει "σύγκρινε τες με βάση το μήκος της λίστας τους στο ευρετήριο".
-        chosen_flight = min(
-            uncovered_flights, 
-            key=lambda f: len(self.flight_index[f])
-        )
-
-        # --- 4. RECURSION (ΔΟΚΙΜΕΣ) ---
-        # Παίρνουμε τους υποψήφιους συνδυασμούς για αυτή τη δύσκολη πτήση
-        candidates = self.flight_index[chosen_flight]
+        # --- 3. MEMOIZATION (LOOKUP) ---
+        # Έχουμε ξαναδεί αυτό το σύνολο ακάλυπτων πτήσεων;
+        entry = self.memo.get(uncovered_flights)
+        if entry is not None:
+            kind, value, completion = entry
+            if kind == TranspositionTable.EXACT:
+                # Ξέρουμε ακριβώς τη βέλτιστη συμπλήρωση: O(1) αντί για ολόκληρο υποδέντρο.
+                if value < budget:
+                    self._new_best(current_cost + value, current_solution + list(completion))
+                    return value
+                return float('inf')
+            # Κάτω φράγμα: αν ούτε στην καλύτερη περίπτωση δεν βελτιώνουμε, κόβουμε.
+            if value >= budget:
+                return float('inf')
+
+        if last is not None:
+            self._select(last)
+
+        # --- 4. HEURISTIC MRV (DYNAMIC) ---
+        # ΟΧΙ την πρώτη τυχαία. Διαλέγουμε αυτή που έχει τις ΛΙΓΟΤΕΡΕΣ επιλογές.
+        # Μετράμε μόνο τα pairings που είναι ακόμα επιλέξιμα, όχι όλο το ευρετήριο.
+        remaining = self.remaining
+        chosen_flight = min(mask_to_flights(uncovered_flights), key=remaining.__getitem__)
+
+        # Αν κάποια ακάλυπτη πτήση δεν έχει πια κανένα επιλέξιμο pairing,
+        # αυτό το υποπρόβλημα δεν έχει λύση.
+        if not remaining[chosen_flight]:
+            self.memo.store(uncovered_flights, TranspositionTable.LOWER, float('inf'))
+            return float('inf')
+
+        # --- 5. RECURSION (ΔΟΚΙΜΕΣ) ---
+        # Παίρνουμε τους υποψήφιους συνδυασμούς για αυτή τη δύσκολη πτήση,
+        # με σειρά αύξοντος κόστους ανά πτήση.
+        store = self.store
+        order = self.branch_order
+        feasible = self.feasible
+        best_completion = float('inf')
         
-        for p in candidates:
+        for k in range(store.flight_offsets[chosen_flight - 1], store.flight_offsets[chosen_flight]):
+            j = order[k]
             # ΕΛΕΓΧΟΣ ΕΓΚΥΡΟΤΗΤΑΣ (CONSTRAINT CHECK):
             # Για να διαλέξουμε αυτό το pairing, πρέπει ΟΛΕΣ οι πτήσεις του
             # να είναι ακόμα ακάλυπτες. Αν έστω και μία έχει καλυφθεί ήδη,
-            # τότε έχουμε σύγκρουση (overlap).
-            if p['flights'].issubset(uncovered_flights):
-                
-                # Υπολογίζουμε τη νέα κατάσταση
-                # Αφαιρούμε τις πτήσεις του pairing από τις ακάλυπτες
-                remaining_flights = uncovered_flights - p['flights']
-                
-                # Καλούμε αναδρομή για το επόμενο βήμα
-                self._search(
-                    remaining_flights, 
-                    current_cost + p['cost'], 
-                    current_solution + [p['id']]
-                )
+            # τότε έχουμε σύγκρουση (overlap) και το j δεν είναι πια στο feasible.
+            if not feasible[j]:
+                continue
                 
+            # Υπολογίζουμε τη νέα κατάσταση
+            # Αφαιρούμε τις πτήσεις του pairing από τις ακάλυπτες
+            # (όσα pairings συγκρούονται μαζί του τα βγάζει το _select του παιδιού)
+            remaining_flights = uncovered_flights ^ store.pairing_mask(j)
+            mark = len(self.removed)
+            
+            # Καλούμε αναδρομή για το επόμενο βήμα
+            sub_cost = self._search(
+                remaining_flights, 
+                current_cost + store.costs[j], 
+                current_solution + [store.pairing_id(j)],
+                j
+            )
+            self._undo(mark)
+            best_completion = min(best_completion, store.costs[j] + sub_cost)
+
+        # --- 6. MEMOIZATION (STORE) ---
+        if best_completion < budget:
+            # Το υποδέντρο βελτίωσε τη λύση, άρα τη βρήκε ολόκληρη και είναι
+            # η βέλτιστη για αυτές τις πτήσεις. Η τελευταία βελτίωση ήρθε από εδώ,
+            # οπότε η συμπλήρωση είναι η "ουρά" της best_solution.
+            completion = tuple(self.best_solution[len(current_solution):])
+            self.memo.store(uncovered_flights, TranspositionTable.EXACT, best_completion, completion)
+        else:
+            # Τίποτα φθηνότερο από budget εδώ μέσα: κάτω φράγμα.
+            self.memo.store(uncovered_flights, TranspositionTable.LOWER, budget)
+        return best_completion
+
+
+def mask_to_flights(mask):
+    """
+    Επιστρέφει (generator) τις πτήσεις που αντιστοιχούν στα bits της μάσκας.
+    """
+    while mask:
+        low = mask & -mask  # το χαμηλότερο bit που είναι 1
+        yield low.bit_length()
+        mask ^= low
+
 if __name__ == "__main__":
-    import sys
-    
-    if len(sys.argv) < 2:
-        print("Usage: python3 pairing_solver.py <filename>")
-        sys.exit(1)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Crew pairing (set partitioning) solver")
+    parser.add_argument('filename')
+    parser.add_argument('--time-limit', type=float, default=None,
+                        help="σταματάει μετά από τόσα δευτερόλεπτα με την καλύτερη λύση μέχρι τότε")
+    parser.add_argument('--progress', type=float, default=None, metavar='SECONDS',
+                        help="τυπώνει incumbent/κάτω φράγμα/gap/κόμβους ανά δευτερόλεπτο κάθε τόσα δευτερόλεπτα")
+    parser.add_argument('--results', default=None, metavar='FILE',
+                        help="γράφει (atomically) την καλύτερη λύση σε JSON κάθε φορά που βελτιώνεται")
+    parser.add_argument('--verbose', '-v', action='store_true',
+                        help="τυπώνει κάθε νέα καλύτερη λύση (πάντα με --progress)")
+    args = parser.parse_args()
 
-    filename = sys.argv[1] 
+    filename = args.filename
+    # Σε anytime mode θέλουμε reports ακόμα κι αν δεν δόθηκε --progress
+    progress = args.progress
+    if progress is None and args.time_limit is not None:
+        progress = 5.0
     
     try:
-        # 1. Διάβασμα
-        N, data = parse_dataset(filename)
+        # 1. Διάβασμα (columnar)
+        load_start = time.perf_counter()
+        data = load_columnar(filename)
+        load_time = time.perf_counter() - load_start
+        N = data.num_flights
+        print(f"LOAD | Pairings: {len(data)} | Bytes: {data.nbytes()} | Time: {load_time:.3f}s")
         
         # 2. Επίλυση
         solver = SetPartitionSolver(N, data)
-        cost, sol = solver.solve()
+        cost, sol = solver.solve(time_limit=args.time_limit, progress_interval=progress,
+                                 results_file=args.results, instance=filename, verbose=args.verbose)
         
         # 3. Αποτέλεσμα (ΤΡΟΠΟΠΟΙΗΣΗ ΓΙΑ ΝΑ ΤΥΠΩΝΕΙ ΤΗ ΛΙΣΤΑ)
         # Τυπώνουμε σε μία γραμμή: Αρχείο, Κόστος, Πλήθος, και μετά τη Λίστα των IDs
         print(f"RESULT | File: {filename} | Cost: {cost} | Count: {len(sol)} | Selected Pairings: {sorted(sol)}")
+        if not solver.optimal:
+            print(f"NOT PROVEN OPTIMAL | Lower bound: {solver.lower_bound:.1f} | Gap: {100 * solver.gap():.2f}%")
+        # Στατιστικά αναζήτησης και transposition table
+        memo = solver.memo
+        probes = memo.hits + memo.misses
+        hit_rate = 100 * memo.hits / probes if probes else 0.0
+        print(f"STATS | Nodes: {solver.nodes} | TT entries: {len(memo)} | "
+              f"TT hits: {memo.hits} | TT misses: {memo.misses} | Hit rate: {hit_rate:.1f}%")
         
     except FileNotFoundError:
-        print(f"Error: File '{filename}' not found.")
\ No newline at end of file
+        print(f"Error: File '{filename}' not found.")